@@ -0,0 +1,55 @@
+"""performance indexes
+
+Composite indexes matched to the hot query shapes:
+
+* transactions (date, id): list ordering, keyset cursors, date ranges
+* transactions (category_id, date): category filter plus date range
+* transactions (type, date) INCLUDE (amount, category_id): expense sums by
+  date answered by an index-only scan on Postgres
+* budgets (start_date, end_date) and (category_id): active budget lookups
+
+On Postgres the indexes are built CONCURRENTLY so existing tables stay
+writable during the upgrade.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_transactions_date_id', 'transactions', ['date', 'id'], {}),
+    ('ix_transactions_category_id_date', 'transactions', ['category_id', 'date'], {}),
+    (
+        'ix_transactions_type_date',
+        'transactions',
+        ['type', 'date'],
+        {'postgresql_include': ['amount', 'category_id']},
+    ),
+    ('ix_budgets_start_date_end_date', 'budgets', ['start_date', 'end_date'], {}),
+    ('ix_budgets_category_id', 'budgets', ['category_id'], {}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
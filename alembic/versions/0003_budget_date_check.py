@@ -0,0 +1,34 @@
+"""budget date check
+
+Budgets must end after they start. Updates are validated inside the UPDATE
+statement itself; the constraint backs that up for every other writer.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('budgets') as batch_op:
+        batch_op.create_check_constraint(
+            'ck_budgets_end_date_after_start_date', 'end_date > start_date'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('budgets') as batch_op:
+        batch_op.drop_constraint('ck_budgets_end_date_after_start_date', type_='check')
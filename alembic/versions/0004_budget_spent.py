@@ -0,0 +1,48 @@
+"""budget spent counter
+
+Adds budgets.spent, the running total of the expenses each budget covers,
+and backfills it. The application keeps it current on every write from then
+on (``python -m app.cli rebuild-budget-spent`` repairs drift).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'budgets',
+        sa.Column('spent', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    )
+    op.execute(
+        """
+        UPDATE budgets SET spent = (
+            SELECT coalesce(sum(t.amount), 0)
+            FROM transactions t
+            WHERE t.type = 'EXPENSE'
+              AND t.date >= budgets.start_date
+              AND t.date <= budgets.end_date
+              AND (budgets.category_id IS NULL OR t.category_id = budgets.category_id)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('budgets') as batch_op:
+        batch_op.drop_column('spent')
@@ -0,0 +1,63 @@
+"""daily totals rollup
+
+Adds daily_totals, the per-day, per-category, per-type rollup the analytics
+read, and backfills it from the existing transactions. The application keeps
+it current on every write from then on (``python -m app.cli
+rebuild-daily-totals`` repairs drift).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'daily_totals',
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        # The enum type already exists: 0001 created it for transactions
+        sa.Column(
+            'type',
+            postgresql.ENUM('INCOME', 'EXPENSE', name='transactiontype', create_type=False),
+            nullable=False,
+        ),
+        sa.Column('total', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('date', 'category_id', 'type'),
+    )
+    op.execute(
+        """
+        INSERT INTO daily_totals (date, category_id, type, total, count)
+        SELECT date, category_id, type, sum(amount), count(*)
+        FROM transactions
+        GROUP BY date, category_id, type
+        """
+    )
+    # After the backfill, so the rows are not indexed one at a time
+    op.create_index(
+        'ix_daily_totals_type_date',
+        'daily_totals',
+        ['type', 'date'],
+        postgresql_include=['category_id', 'total', 'count'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_daily_totals_type_date', table_name='daily_totals')
+    op.drop_table('daily_totals')
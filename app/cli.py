@@ -0,0 +1,38 @@
+"""Maintenance commands, run as ``python -m app.cli <command>``."""
+
+import argparse
+import asyncio
+
+from app.database import async_session
+from app.services import rollup_service
+
+
+async def rebuild_daily_totals() -> None:
+    async with async_session() as db:
+        rows = await rollup_service.rebuild_daily_totals(db)
+        await db.commit()
+    print(f"Rebuilt daily_totals: {rows} row(s)")
+
+
+async def rebuild_budget_spent() -> None:
+    async with async_session() as db:
+        corrected = await rollup_service.rebuild_budget_spent(db)
+        await db.commit()
+    print(f"Rebuilt budgets.spent: {corrected} budget(s) corrected")
+
+
+COMMANDS = {
+    "rebuild-budget-spent": rebuild_budget_spent,
+    "rebuild-daily-totals": rebuild_daily_totals,
+}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args(argv)
+    asyncio.run(COMMANDS[args.command]())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,22 @@
+from typing import Any, Literal
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Defaults applied when APP_ENV=production, unless set explicitly
+PRODUCTION_DEFAULTS: dict[str, Any] = {
+    "DEBUG": False,
+    "SQL_ECHO": False,
+    "DB_POOL_SIZE": 20,
+    "DB_MAX_OVERFLOW": 10,
+    "DB_POOL_TIMEOUT": 10.0,
+    "DB_POOL_RECYCLE": 1800,
+    "DB_POOL_PRE_PING": True,
+    "DB_STATEMENT_CACHE_SIZE": 500,
+    "DB_STATEMENT_TIMEOUT_MS": 30_000,
+    "SQL_QUERY_HEADER": False,
+}
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
@@ -8,5 +25,56 @@ class Settings(BaseSettings):
     APP_ENV: str = "development"
     DEBUG: bool = True
 
+    # Optional read replica for analytics and GET routes
+    READ_DATABASE_URL: str | None = None
+    # Reads go to the primary for this long after a write committed in this process
+    READ_YOUR_WRITES_SECONDS: float = 2.0
+    # After a failed replica connection, use the primary for this long
+    REPLICA_RETRY_SECONDS: float = 5.0
+
+    # Log every SQL statement (synchronously); keep off outside local debugging
+    SQL_ECHO: bool = False
+    # Report the number of SQL statements per request in X-Query-Count
+    SQL_QUERY_HEADER: bool = False
+
+    # Connection pool (ignored for SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+
+    # asyncpg driver tuning (ignored for other drivers)
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_STATEMENT_TIMEOUT_MS: int | None = None
+
+    # In-process analytics result cache; size 0 disables it
+    ANALYTICS_CACHE_SIZE: int = 256
+    ANALYTICS_CACHE_TTL: float = 30.0
+    # "numpy" answers balance, spending, summaries and trends from an in-memory
+    # columnar copy of the rollup (needs numpy), reloaded after the snapshot TTL
+    ANALYTICS_ENGINE: Literal["sql", "numpy"] = "sql"
+    ANALYTICS_SNAPSHOT_TTL: float = 300.0
+
+    # Category id -> name directory; reloaded after this long to see other workers' writes
+    CATEGORY_CACHE_TTL: float = 60.0
+    # In-process budget interval index; reloaded after budget writes (any worker)
+    # and, as a backstop, after this long
+    BUDGET_INDEX_TTL: float = 60.0
+
+    # Group-commit concurrent single-transaction POSTs: wait up to the window
+    # (or until max rows are queued), then write them in one INSERT and commit
+    WRITE_BATCHING: bool = False
+    WRITE_BATCH_WINDOW_MS: float = 2.0
+    WRITE_BATCH_MAX_ROWS: int = 100
+
+    @model_validator(mode="after")
+    def apply_environment_profile(self):
+        if self.APP_ENV == "production":
+            for field, value in PRODUCTION_DEFAULTS.items():
+                if field not in self.model_fields_set:
+                    setattr(self, field, value)
+        return self
+
 
 settings = Settings()
@@ -1,13 +1,192 @@
+import math
+import time
 from collections.abc import AsyncGenerator
+from contextvars import ContextVar
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import Depends, Request
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.config import settings
+from app.config import Settings, settings
+from app.metrics import POOL_WAIT
 
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.wait_count += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            POOL_WAIT.observe(waited)
+
+
+def engine_options(config: Settings, url: str | None = None) -> dict[str, Any]:
+    """``create_async_engine`` keyword arguments for ``url`` (default DATABASE_URL)."""
+    url = make_url(url or config.DATABASE_URL)
+    options: dict[str, Any] = {"echo": config.SQL_ECHO}
+    if url.get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+    )
+    if url.get_driver_name() == "asyncpg":
+        connect_args: dict[str, Any] = {
+            "prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+        }
+        if config.DB_STATEMENT_TIMEOUT_MS is not None:
+            connect_args["server_settings"] = {
+                "statement_timeout": str(config.DB_STATEMENT_TIMEOUT_MS)
+            }
+        options["connect_args"] = connect_args
+    return options
+
+
+def pool_stats(target: AsyncEngine) -> dict[str, Any]:
+    """Saturation snapshot of an engine's connection pool."""
+    pool = target.pool
+    stats: dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            wait_count=pool.wait_count,
+            wait_seconds_total=pool.wait_seconds_total,
+            wait_seconds_max=pool.wait_seconds_max,
+            timeouts=pool.timeouts,
+        )
+    return stats
+
+
+class ReplicaRouting:
+    """Decides per request whether reads may go to the replica.
+
+    Read-your-writes is tracked per client: a response to a request that
+    wrote carries a cookie holding the time until which that client's reads
+    go to the primary. Other clients keep using the replica, and the cookie
+    works whichever worker serves the next read.
+    """
+
+    def __init__(self, read_your_writes_seconds: float, retry_seconds: float):
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.retry_seconds = retry_seconds
+        self.unavailable_until = float("-inf")
+
+    def write_cookie(self) -> str | None:
+        """``Set-Cookie`` value opening the read-your-writes window, if there is one."""
+        if self.read_your_writes_seconds <= 0:
+            return None
+        until = time.time() + self.read_your_writes_seconds
+        max_age = math.ceil(self.read_your_writes_seconds)
+        return (
+            f"{READ_YOUR_WRITES_COOKIE}={until:.3f}; Max-Age={max_age}; Path=/; "
+            "HttpOnly; SameSite=Lax"
+        )
+
+    def mark_unavailable(self) -> None:
+        self.unavailable_until = time.monotonic() + self.retry_seconds
+
+    def use_primary(self, wrote_until: str | None = None) -> bool:
+        """``wrote_until`` is the client's read-your-writes cookie, if it sent one."""
+        if time.monotonic() < self.unavailable_until:
+            return True
+        try:
+            return wrote_until is not None and float(wrote_until) > time.time()
+        except ValueError:
+            return False
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware setting the read-your-writes cookie on requests that wrote.
+
+    Sessions flag writes as they flush or run DML, which happens before the
+    response starts; the commit itself only follows once it is sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or read_session is None:
+            await self.app(scope, receive, send)
+            return
+
+        wrote = [False]
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and wrote[0]:
+                cookie = replica_routing.write_cookie()
+                if cookie is not None:
+                    MutableHeaders(scope=message).append("set-cookie", cookie)
+            await send(message)
+
+        token = _request_wrote.set(wrote)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_wrote.reset(token)
+
+
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings))
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+read_engine = (
+    create_async_engine(
+        settings.READ_DATABASE_URL, **engine_options(settings, settings.READ_DATABASE_URL)
+    )
+    if settings.READ_DATABASE_URL
+    else None
+)
+
+read_session = (
+    async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+    if read_engine is not None
+    else None
+)
+
+replica_routing = ReplicaRouting(settings.READ_YOUR_WRITES_SECONDS, settings.REPLICA_RETRY_SECONDS)
+
+# Requests carrying this header always read from the primary
+READ_PRIMARY_HEADER = "x-read-primary"
+# Until the time in this cookie, the client's reads go to the primary
+READ_YOUR_WRITES_COOKIE = "read_primary_until"
+
+# Set by ReadYourWritesMiddleware for the request being handled
+_request_wrote: ContextVar[list[bool] | None] = ContextVar("request_wrote", default=None)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
@@ -17,3 +196,55 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         except Exception:
             await session.rollback()
             raise
+
+
+async def get_read_db(
+    request: Request, primary: AsyncSession = Depends(get_db)
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only routes: the replica when configured and safe.
+
+    Falls back to the primary session when no replica is configured, when the
+    client sends ``X-Read-Primary``, shortly after that client wrote (its
+    read-your-writes cookie), and while the replica is unreachable. The primary
+    session is opened lazily, so it costs nothing when the replica serves the
+    request.
+    """
+    if (
+        read_session is None
+        or request.headers.get(READ_PRIMARY_HEADER)
+        or replica_routing.use_primary(request.cookies.get(READ_YOUR_WRITES_COOKIE))
+    ):
+        yield primary
+        return
+
+    session = read_session()
+    try:
+        await session.connection()
+    except (OSError, exc.SQLAlchemyError):
+        await session.close()
+        replica_routing.mark_unavailable()
+        yield primary
+        return
+
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+def mark_request_wrote() -> None:
+    """Open the read-your-writes window for the current request's client."""
+    wrote = _request_wrote.get()
+    if wrote is not None:
+        wrote[0] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _flag_flush(session: Session, flush_context) -> None:
+    mark_request_wrote()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_dml(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mark_request_wrote()
@@ -14,6 +14,11 @@ class ConflictException(Exception):
         self.message = message
 
 
+class ValidationException(ValueError):
+    def __init__(self, message: str):
+        self.message = message
+
+
 def register_exception_handlers(app: FastAPI) -> None:
     @app.exception_handler(NotFoundException)
     async def not_found_handler(request: Request, exc: NotFoundException):
@@ -22,3 +27,7 @@ def register_exception_handlers(app: FastAPI) -> None:
     @app.exception_handler(ConflictException)
     async def conflict_handler(request: Request, exc: ConflictException):
         return JSONResponse(status_code=409, content={"detail": exc.message})
+
+    @app.exception_handler(ValidationException)
+    async def validation_handler(request: Request, exc: ValidationException):
+        return JSONResponse(status_code=422, content={"detail": exc.message})
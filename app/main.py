@@ -2,13 +2,29 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from app.config import settings
+from app.database import ReadYourWritesMiddleware, async_session
+from app.etag import ETagMiddleware
 from app.exceptions import register_exception_handlers
-from app.routers import analytics, budgets, categories, transactions
+from app.metrics import MetricsMiddleware
+from app.routers import analytics, budgets, categories, metrics, system, transactions
+from app.services.category_cache import category_directory
+from app.services.columnar_analytics import columnar_snapshot
+from app.services.write_batcher import transaction_batcher
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    yield
+    async with async_session() as db:
+        await category_directory.load(db)
+    if columnar_snapshot.enabled:
+        await columnar_snapshot.load()
+    if settings.WRITE_BATCHING:
+        transaction_batcher.start(async_session)
+    try:
+        yield
+    finally:
+        await transaction_batcher.stop()
 
 
 def create_app() -> FastAPI:
@@ -20,11 +36,16 @@ def create_app() -> FastAPI:
     )
 
     register_exception_handlers(app)
+    app.add_middleware(ReadYourWritesMiddleware)
+    app.add_middleware(ETagMiddleware)
+    app.add_middleware(MetricsMiddleware)
 
     app.include_router(categories.router)
     app.include_router(transactions.router)
     app.include_router(budgets.router)
     app.include_router(analytics.router)
+    app.include_router(system.router)
+    app.include_router(metrics.router)
 
     return app
 
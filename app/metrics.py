@@ -0,0 +1,245 @@
+"""In-process Prometheus metrics: request latency, SQL timing and pool waits.
+
+Everything is recorded in plain Python objects on the event-loop thread and
+rendered in the Prometheus text exposition format at ``/metrics``.
+"""
+
+import bisect
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a fixed tuple of label names."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in sorted(self._series.items()):
+            labels = _format_labels(self.labels, label_values)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{self.name}_bucket{_with_le(labels, repr(float(bound)))} {cumulative}'
+                )
+            lines.append(f'{self.name}_bucket{_with_le(labels, "+Inf")} {count}')
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def reset(self) -> None:
+        self._series.clear()
+
+
+@dataclass
+class QueryStats:
+    """SQL statements executed while this collector was active.
+
+    ``statements`` is only filled in when the collector was created with
+    ``capture=True``.
+    """
+
+    count: int = 0
+    seconds: float = 0.0
+    statements: list[str] | None = field(default=None, repr=False)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+_active_query_stats: ContextVar[tuple[QueryStats, ...]] = ContextVar(
+    "active_query_stats", default=()
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def track_queries(capture: bool = False) -> Iterator[QueryStats]:
+    """Collect SQL count and time for everything executed inside the block.
+
+    Collectors nest: a statement counts towards every active collector.
+    """
+    stats = QueryStats(statements=[] if capture else None)
+    token = _active_query_stats.set(_active_query_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_query_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """Fail if the block executes more than ``limit`` SQL statements."""
+    with track_queries(capture=True) as stats:
+        yield stats
+    if stats.count > limit:
+        listing = "\n".join(f"  {i}. {sql}" for i, sql in enumerate(stats.statements, 1))
+        raise QueryBudgetExceeded(
+            f"{stats.count} SQL statements executed, budget is {limit}:\n{listing}"
+        )
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status.",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+REQUEST_SQL_QUERIES = Histogram(
+    "http_request_sql_queries",
+    "SQL statements executed per HTTP request.",
+    ("method", "route"),
+    QUERY_COUNT_BUCKETS,
+)
+REQUEST_SQL_DURATION = Histogram(
+    "http_request_sql_duration_seconds",
+    "Time spent executing SQL per HTTP request.",
+    ("method", "route"),
+    LATENCY_BUCKETS,
+)
+SQL_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Duration of individual SQL statements.",
+    (),
+    LATENCY_BUCKETS,
+)
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the pool.",
+    (),
+    LATENCY_BUCKETS,
+)
+
+HISTOGRAMS = (REQUEST_LATENCY, REQUEST_SQL_QUERIES, REQUEST_SQL_DURATION, SQL_QUERY_DURATION, POOL_WAIT)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and SQL work per route template."""
+
+    def __init__(self, app: ASGIApp, query_header: bool | None = None):
+        self.app = app
+        self.query_header = settings.SQL_QUERY_HEADER if query_header is None else query_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                if self.query_header:
+                    # Streaming bodies may query after this point; they are not counted
+                    MutableHeaders(scope=message)[QUERY_COUNT_HEADER] = str(queries.count)
+            await send(message)
+
+        started = time.perf_counter()
+        with track_queries() as queries:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                elapsed = time.perf_counter() - started
+                route = scope.get("route")
+                template = getattr(route, "path", None) or "unmatched"
+                method = scope["method"]
+                REQUEST_LATENCY.observe(elapsed, method, template, status)
+                REQUEST_SQL_QUERIES.observe(queries.count, method, template)
+                REQUEST_SQL_DURATION.observe(queries.seconds, method, template)
+
+
+def render_metrics(extra: list[str] = ()) -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    lines.extend(extra)
+    return "\n".join(lines) + "\n"
+
+
+def gauge(
+    name: str, help: str, value: float | dict[str, float], label: str | None = None
+) -> list[str]:
+    """A gauge with one sample, or one per ``label`` value when ``value`` is a dict."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    if not isinstance(value, dict):
+        return lines + [f"{name} {value}"]
+    return lines + [
+        f"{name}{_format_labels((label,), (key,))} {sample}" for key, sample in value.items()
+    ]
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _with_le(labels: str, le: str) -> str:
+    if labels:
+        return labels[:-1] + f',le="{le}"' + "}"
+    return '{le="' + le + '"}'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    SQL_QUERY_DURATION.observe(elapsed)
+    for stats in _active_query_stats.get():
+        stats.record(statement, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_query_timer(exception_context) -> None:
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started_at"):
+        connection.info["query_started_at"].pop()
@@ -1,6 +1,8 @@
 from app.models.base import Base
 from app.models.budget import Budget
 from app.models.category import Category
+from app.models.daily_total import DailyTotal
+from app.models.data_version import DataVersion
 from app.models.transaction import Transaction, TransactionType
 
-__all__ = ["Base", "Budget", "Category", "Transaction", "TransactionType"]
+__all__ = ["Base", "Budget", "Category", "DailyTotal", "DataVersion", "Transaction", "TransactionType"]
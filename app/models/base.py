@@ -9,6 +9,9 @@ class Base(DeclarativeBase):
 
 
 class TimestampMixin:
+    # Fetch server-generated id/timestamps with INSERT ... RETURNING instead of a SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
     id: Mapped[int] = mapped_column(primary_key=True)
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.now())
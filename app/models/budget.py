@@ -1,7 +1,7 @@
 from datetime import date
 from decimal import Decimal
 
-from sqlalchemy import ForeignKey, Numeric, String
+from sqlalchemy import CheckConstraint, ForeignKey, Index, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin
@@ -9,11 +9,19 @@ from app.models.base import Base, TimestampMixin
 
 class Budget(TimestampMixin, Base):
     __tablename__ = "budgets"
+    __table_args__ = (
+        # Active-budget lookups: start_date <= day AND end_date >= day
+        Index("ix_budgets_start_date_end_date", "start_date", "end_date"),
+        Index("ix_budgets_category_id", "category_id"),
+        CheckConstraint("end_date > start_date", name="ck_budgets_end_date_after_start_date"),
+    )
 
     name: Mapped[str] = mapped_column(String(100))
     amount: Mapped[Decimal] = mapped_column(Numeric(12, 2))
     start_date: Mapped[date]
     end_date: Mapped[date]
     category_id: Mapped[int | None] = mapped_column(ForeignKey("categories.id"))
+    # Running total of covered expenses, maintained by rollup_service
+    spent: Mapped[Decimal] = mapped_column(Numeric(14, 2), server_default="0")
 
     category: Mapped["Category | None"] = relationship(back_populates="budgets")  # noqa: F821
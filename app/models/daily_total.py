@@ -0,0 +1,29 @@
+import datetime
+from decimal import Decimal
+
+from sqlalchemy import Index, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+from app.models.transaction import TransactionType
+
+
+class DailyTotal(Base):
+    """Per-day rollup of transactions, maintained by ``rollup_service``."""
+
+    __tablename__ = "daily_totals"
+    __table_args__ = (
+        # Per-type date-range scans (balance, trends, spending by category)
+        Index(
+            "ix_daily_totals_type_date",
+            "type",
+            "date",
+            postgresql_include=["category_id", "total", "count"],
+        ),
+    )
+
+    date: Mapped[datetime.date] = mapped_column(primary_key=True)
+    category_id: Mapped[int] = mapped_column(primary_key=True)
+    type: Mapped[TransactionType] = mapped_column(primary_key=True)
+    total: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0)
+    count: Mapped[int] = mapped_column(default=0)
@@ -1,8 +1,8 @@
+import datetime
 import enum
-from datetime import date
 from decimal import Decimal
 
-from sqlalchemy import ForeignKey, Numeric, String
+from sqlalchemy import ForeignKey, Index, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin
@@ -15,11 +15,25 @@ class TransactionType(str, enum.Enum):
 
 class Transaction(TimestampMixin, Base):
     __tablename__ = "transactions"
-
-    amount: Mapped[Decimal] = mapped_column(Numeric(12, 2))
-    type: Mapped[TransactionType]
+    __table_args__ = (
+        # Listing order, keyset cursors and plain date-range filters
+        Index("ix_transactions_date_id", "date", "id"),
+        # Category filter (+ date range) and the category delete check
+        Index("ix_transactions_category_id_date", "category_id", "date"),
+        # Expense sums over a date range, answered from the index alone on Postgres
+        Index(
+            "ix_transactions_type_date",
+            "type",
+            "date",
+            postgresql_include=["amount", "category_id"],
+        ),
+    )
+
+    # active_history keeps the old value on update so rollups can apply deltas
+    amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), active_history=True)
+    type: Mapped[TransactionType] = mapped_column(active_history=True)
     description: Mapped[str | None] = mapped_column(String(255))
-    date: Mapped[date]
-    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"))
+    date: Mapped[datetime.date] = mapped_column(active_history=True)
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), active_history=True)
 
     category: Mapped["Category"] = relationship(back_populates="transactions")  # noqa: F821
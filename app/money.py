@@ -0,0 +1,100 @@
+"""Fixed-point money for internal arithmetic.
+
+Amounts are stored as NUMERIC with two decimal places. Services aggregate
+them as integer cents (``Money``) and turn them into ``Decimal`` once, when a
+response is built, instead of constructing Decimals for every row.
+"""
+
+import functools
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, ColumnElement, cast, func
+
+
+@functools.total_ordering
+class Money:
+    """An exact amount of money held as an integer number of cents."""
+
+    __slots__ = ("cents",)
+
+    def __init__(self, cents: int = 0):
+        self.cents = cents
+
+    @classmethod
+    def of(cls, amount: "Money | Decimal | int | float | str") -> "Money":
+        """Convert an amount in currency units (``Decimal("10.30")`` -> 1030 cents)."""
+        if isinstance(amount, Money):
+            return amount
+        if isinstance(amount, int):
+            return cls(amount * 100)
+        if not isinstance(amount, Decimal):
+            amount = Decimal(str(amount))
+        return cls(int(amount.scaleb(2).to_integral_value()))
+
+    @property
+    def decimal(self) -> Decimal:
+        """The amount as a two-place Decimal, for responses and bind parameters."""
+        return Decimal(self.cents).scaleb(-2)
+
+    def percent_of(self, whole: "Money") -> float:
+        """``self`` as a percentage of ``whole``, rounded to two places; 0.0 for no whole."""
+        if whole.cents <= 0:
+            return 0.0
+        return round(self.cents * 100 / whole.cents, 2)
+
+    def __add__(self, other: "Money") -> "Money":
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.cents + other.cents)
+
+    def __radd__(self, other: int) -> "Money":
+        # sum() starts from 0
+        if other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other: "Money") -> "Money":
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.cents - other.cents)
+
+    def __neg__(self) -> "Money":
+        return Money(-self.cents)
+
+    def __mul__(self, factor: int) -> "Money":
+        if not isinstance(factor, int):
+            return NotImplemented
+        return Money(self.cents * factor)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.cents == other.cents
+
+    def __lt__(self, other: "Money") -> bool:
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.cents < other.cents
+
+    def __hash__(self) -> int:
+        return hash(self.cents)
+
+    def __bool__(self) -> bool:
+        return self.cents != 0
+
+    def __repr__(self) -> str:
+        return f"Money({self.decimal})"
+
+
+ZERO = Money()
+
+
+def sql_cents(amount: ColumnElement) -> ColumnElement[int]:
+    """``amount`` in integer cents, computed by the database.
+
+    ROUND before the cast: SQLite keeps NUMERIC values as floats, and a sum
+    such as 10.1 * 100 can land just below the whole number.
+    """
+    return cast(func.round(amount * 100), BigInteger)
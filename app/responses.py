@@ -0,0 +1,45 @@
+from functools import lru_cache
+from typing import Any
+
+from pydantic import BaseModel, TypeAdapter
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+class ModelResponse(Response):
+    """JSON response serialized once by pydantic-core.
+
+    Returning this from a route bypasses FastAPI's ``response_model``
+    re-validation and generic encoding (the ``response_model`` still documents
+    the route). ``content`` is a model instance, or anything ``response_type``
+    validates from (e.g. a list of ORM objects for ``list[CategoryResponse]``).
+    Output is identical to FastAPI's: Decimals as strings, dates in ISO format.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        response_type: Any = None,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+        background: BackgroundTask | None = None,
+    ):
+        if response_type is None:
+            if not isinstance(content, BaseModel):
+                raise TypeError("response_type is required for non-model content")
+            response_type = type(content)
+        self.response_type = response_type
+        super().__init__(content, status_code, headers, self.media_type, background)
+
+    def render(self, content: Any) -> bytes:
+        adapter = _adapter(self.response_type)
+        if not isinstance(content, BaseModel):
+            content = adapter.validate_python(content, from_attributes=True)
+        return adapter.dump_json(content)
@@ -3,55 +3,116 @@ from datetime import date
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_read_db
+from app.etag import conditional_get
+from app.exceptions import ValidationException
+from app.models.budget import Budget
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.responses import ModelResponse
 from app.schemas.analytics import (
     BalanceResponse,
     BudgetStatusResponse,
+    CacheStatsResponse,
     MonthlySummaryResponse,
     SpendingByCategoryResponse,
+    TimeSeriesResponse,
     TrendResponse,
 )
 from app.services import analytics_service
+from app.services.analytics_cache import analytics_cache
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
 
-@router.get("/balance", response_model=BalanceResponse)
+@router.get(
+    "/balance",
+    response_model=BalanceResponse,
+    dependencies=[Depends(conditional_get(Transaction))],
+)
 async def get_balance(
     start_date: date | None = None,
     end_date: date | None = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return await analytics_service.get_balance(db, start_date=start_date, end_date=end_date)
+    return ModelResponse(
+        await analytics_service.get_balance(db, start_date=start_date, end_date=end_date)
+    )
 
 
-@router.get("/spending-by-category", response_model=SpendingByCategoryResponse)
+@router.get(
+    "/spending-by-category",
+    response_model=SpendingByCategoryResponse,
+    dependencies=[Depends(conditional_get(Transaction, Category))],
+)
 async def get_spending_by_category(
     start_date: date | None = None,
     end_date: date | None = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return await analytics_service.get_spending_by_category(
-        db, start_date=start_date, end_date=end_date
+    return ModelResponse(
+        await analytics_service.get_spending_by_category(
+            db, start_date=start_date, end_date=end_date
+        )
     )
 
 
-@router.get("/monthly-summary", response_model=MonthlySummaryResponse)
+@router.get(
+    "/monthly-summary",
+    response_model=MonthlySummaryResponse,
+    dependencies=[Depends(conditional_get(Transaction))],
+)
 async def get_monthly_summary(
-    year: int = Query(default_factory=lambda: date.today().year),
-    db: AsyncSession = Depends(get_db),
+    # The summary runs to January 1st of the following year
+    year: int = Query(default_factory=lambda: date.today().year, ge=1, le=9998),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return await analytics_service.get_monthly_summary(db, year=year)
+    return ModelResponse(await analytics_service.get_monthly_summary(db, year=year))
 
 
-@router.get("/budget-status", response_model=BudgetStatusResponse)
-async def get_budget_status(db: AsyncSession = Depends(get_db)):
-    return await analytics_service.get_budget_status(db)
+@router.get(
+    "/time-series",
+    response_model=TimeSeriesResponse,
+    dependencies=[Depends(conditional_get(Transaction))],
+)
+async def get_time_series(
+    start_date: date,
+    end_date: date,
+    granularity: str = Query(default="month", pattern="^(day|week|month|quarter|year)$"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Income/expense series over [start_date, end_date); empty buckets are zero."""
+    if end_date <= start_date:
+        raise ValidationException("end_date must be after start_date")
+    return ModelResponse(
+        await analytics_service.get_time_series(
+            db, start_date=start_date, end_date=end_date, granularity=granularity
+        )
+    )
 
 
-@router.get("/trends", response_model=TrendResponse)
+@router.get(
+    "/budget-status",
+    response_model=BudgetStatusResponse,
+    dependencies=[Depends(conditional_get(Budget, Transaction, Category, today_dependent=True))],
+)
+async def get_budget_status(db: AsyncSession = Depends(get_read_db)):
+    return ModelResponse(await analytics_service.get_budget_status(db))
+
+
+@router.get(
+    "/trends",
+    response_model=TrendResponse,
+    dependencies=[Depends(conditional_get(Transaction, today_dependent=True))],
+)
 async def get_trends(
     period: str = Query(default="monthly", pattern="^(monthly|weekly)$"),
-    db: AsyncSession = Depends(get_db),
+    periods: int = Query(default=2, ge=2, le=120),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return await analytics_service.get_trends(db, period=period)
+    return ModelResponse(await analytics_service.get_trends(db, period=period, periods=periods))
+
+
+@router.get("/cache-stats", response_model=CacheStatsResponse)
+async def get_cache_stats():
+    return CacheStatsResponse(**analytics_cache.stats())
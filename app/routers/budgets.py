@@ -1,7 +1,11 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.etag import conditional_get
+from app.models.budget import Budget
+from app.models.transaction import Transaction
+from app.responses import ModelResponse
 from app.schemas.budget import BudgetCreate, BudgetDetailResponse, BudgetResponse, BudgetUpdate
 from app.services import budget_service
 
@@ -13,13 +17,21 @@ async def create_budget(data: BudgetCreate, db: AsyncSession = Depends(get_db)):
     return await budget_service.create_budget(db, data)
 
 
-@router.get("/", response_model=list[BudgetResponse])
-async def list_budgets(db: AsyncSession = Depends(get_db)):
-    return await budget_service.list_budgets(db)
+@router.get(
+    "/",
+    response_model=list[BudgetResponse],
+    dependencies=[Depends(conditional_get(Budget))],
+)
+async def list_budgets(db: AsyncSession = Depends(get_read_db)):
+    return ModelResponse(await budget_service.list_budgets(db), list[BudgetResponse])
 
 
-@router.get("/{budget_id}", response_model=BudgetDetailResponse)
-async def get_budget(budget_id: int, db: AsyncSession = Depends(get_db)):
+@router.get(
+    "/{budget_id}",
+    response_model=BudgetDetailResponse,
+    dependencies=[Depends(conditional_get(Budget, Transaction))],
+)
+async def get_budget(budget_id: int, db: AsyncSession = Depends(get_read_db)):
     return await budget_service.get_budget_detail(db, budget_id)
 
 
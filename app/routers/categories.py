@@ -1,12 +1,19 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy import func, select
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.etag import conditional_get
 from app.exceptions import ConflictException, NotFoundException
+from app.models.budget import Budget
 from app.models.category import Category
 from app.models.transaction import Transaction
+from app.responses import ModelResponse
 from app.schemas.category import CategoryCreate, CategoryResponse, CategoryUpdate
+from app.services import rollup_service
+from app.services.analytics_cache import analytics_cache
+from app.services.budget_index import budget_index
+from app.services.category_cache import category_directory
 
 router = APIRouter(prefix="/api/categories", tags=["categories"])
 
@@ -16,18 +23,27 @@ async def create_category(data: CategoryCreate, db: AsyncSession = Depends(get_d
     category = Category(**data.model_dump())
     db.add(category)
     await db.flush()
-    await db.refresh(category)
+    analytics_cache.invalidate(db)
+    category_directory.invalidate(db)
     return category
 
 
-@router.get("/", response_model=list[CategoryResponse])
-async def list_categories(db: AsyncSession = Depends(get_db)):
+@router.get(
+    "/",
+    response_model=list[CategoryResponse],
+    dependencies=[Depends(conditional_get(Category))],
+)
+async def list_categories(db: AsyncSession = Depends(get_read_db)):
     result = await db.execute(select(Category).order_by(Category.name))
-    return list(result.scalars().all())
+    return ModelResponse(result.scalars().all(), list[CategoryResponse])
 
 
-@router.get("/{category_id}", response_model=CategoryResponse)
-async def get_category(category_id: int, db: AsyncSession = Depends(get_db)):
+@router.get(
+    "/{category_id}",
+    response_model=CategoryResponse,
+    dependencies=[Depends(conditional_get(Category))],
+)
+async def get_category(category_id: int, db: AsyncSession = Depends(get_read_db)):
     category = await db.get(Category, category_id)
     if not category:
         raise NotFoundException("Category", category_id)
@@ -38,35 +54,52 @@ async def get_category(category_id: int, db: AsyncSession = Depends(get_db)):
 async def update_category(
     category_id: int, data: CategoryUpdate, db: AsyncSession = Depends(get_db)
 ):
-    category = await db.get(Category, category_id)
-    if not category:
+    changes = data.model_dump(exclude_unset=True)
+    if not changes:
+        return await get_category(category_id, db)
+
+    category = await db.scalar(
+        update(Category).where(Category.id == category_id).values(**changes).returning(Category)
+    )
+    if category is None:
         raise NotFoundException("Category", category_id)
-
-    for field, value in data.model_dump(exclude_unset=True).items():
-        setattr(category, field, value)
-
-    await db.flush()
-    await db.refresh(category)
+    analytics_cache.invalidate(db)
+    category_directory.invalidate(db)
     return category
 
 
 @router.delete("/{category_id}", status_code=204)
 async def delete_category(category_id: int, db: AsyncSession = Depends(get_db)):
-    category = await db.get(Category, category_id)
-    if not category:
-        raise NotFoundException("Category", category_id)
-
-    # Check for existing transactions
-    count = (
-        await db.execute(
-            select(func.count(Transaction.id)).where(Transaction.category_id == category_id)
-        )
-    ).scalar_one()
-
-    if count > 0:
-        raise ConflictException(
-            f"Cannot delete category: {count} transaction(s) still reference it"
+    unused = ~select(Transaction.id).where(Transaction.category_id == category_id).exists()
+    # Budgets scoped to the category become global, as the ORM cascade used to do,
+    # and now count every category's expenses. The UPDATE carries the DELETE's
+    # guard so budgets are only touched when the delete goes through; it runs
+    # first because budgets.category_id is a plain foreign key.
+    await db.execute(
+        update(Budget)
+        .where(Budget.category_id == category_id, unused)
+        .values(
+            category_id=None,
+            spent=rollup_service.spent_expression(Budget.start_date, Budget.end_date, None),
         )
+        .execution_options(synchronize_session=False)
+    )
+    deleted = await db.scalar(
+        delete(Category).where(Category.id == category_id, unused).returning(Category.id)
+    )
+    if deleted is None:
+        # Nothing was deleted: tell a missing category from one still in use
+        count = (
+            await db.execute(
+                select(func.count(Transaction.id)).where(Transaction.category_id == category_id)
+            )
+        ).scalar_one()
+        if count > 0:
+            raise ConflictException(
+                f"Cannot delete category: {count} transaction(s) still reference it"
+            )
+        raise NotFoundException("Category", category_id)
 
-    await db.delete(category)
-    await db.flush()
+    analytics_cache.invalidate(db)
+    category_directory.invalidate(db)
+    budget_index.invalidate(db)
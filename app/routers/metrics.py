@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.database import engine, pool_stats, read_engine
+from app.metrics import gauge, render_metrics
+
+router = APIRouter(tags=["system"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    pools = {"primary": pool_stats(engine)}
+    if read_engine is not None:
+        pools["replica"] = pool_stats(read_engine)
+    extra: list[str] = []
+    for name, key, help in (
+        ("db_pool_checked_out", "checked_out", "Connections currently checked out."),
+        ("db_pool_overflow", "overflow", "Overflow connections currently open."),
+        ("db_pool_timeouts", "timeouts", "Checkouts that timed out waiting for a connection."),
+    ):
+        values = {pool: stats[key] for pool, stats in pools.items() if key in stats}
+        if values:
+            extra += gauge(name, help, values, label="pool")
+    return PlainTextResponse(render_metrics(extra), media_type=PROMETHEUS_CONTENT_TYPE)
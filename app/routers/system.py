@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+
+from app.database import engine, pool_stats, read_engine
+from app.schemas.system import PoolStatsResponse
+
+router = APIRouter(prefix="/api/system", tags=["system"])
+
+
+@router.get("/pool", response_model=PoolStatsResponse)
+async def get_pool_stats():
+    replica = PoolStatsResponse(**pool_stats(read_engine)) if read_engine is not None else None
+    return PoolStatsResponse(**pool_stats(engine), replica=replica)
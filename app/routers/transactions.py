@@ -1,27 +1,82 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
 from datetime import date
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.models.transaction import TransactionType
+from app.database import get_db, get_read_db, mark_request_wrote
+from app.etag import conditional_get
+from app.exceptions import ValidationException
+from app.models.budget import Budget
+from app.models.transaction import Transaction, TransactionType
+from app.responses import ModelResponse
+from app.schemas.budget import BudgetDetailResponse
 from app.schemas.transaction import (
+    BulkTransactionResponse,
     TransactionCreate,
     TransactionListResponse,
     TransactionResponse,
     TransactionUpdate,
 )
-from app.services import transaction_service
+from app.services import budget_service, transaction_service
+from app.services.write_batcher import transaction_batcher
 
 router = APIRouter(prefix="/api/transactions", tags=["transactions"])
 
 
 @router.post("/", response_model=TransactionResponse, status_code=201)
 async def create_transaction(data: TransactionCreate, db: AsyncSession = Depends(get_db)):
+    if transaction_batcher.running:
+        # The session is opened lazily, so it stays unused here; the batcher
+        # writes from its own task, so flag the write for this request
+        transaction = await transaction_batcher.submit(data)
+        mark_request_wrote()
+        return transaction
     return await transaction_service.create_transaction(db, data)
 
 
-@router.get("/", response_model=TransactionListResponse)
+@router.post("/bulk", response_model=BulkTransactionResponse, status_code=201)
+async def bulk_create_transactions(request: Request, db: AsyncSession = Depends(get_db)):
+    """Accepts a JSON array of transactions or an NDJSON body (one per line).
+
+    NDJSON is read and inserted incrementally, so its size is not bounded by
+    memory; a JSON array has to be parsed whole first.
+    """
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        records = _ndjson_lines(request)
+    else:
+        body = await request.body()
+        try:
+            records = json.loads(body)
+        except ValueError:
+            raise ValidationException("Request body must be a JSON array or NDJSON")
+        if not isinstance(records, list):
+            raise ValidationException("Request body must be a JSON array or NDJSON")
+
+    return await transaction_service.bulk_create_transactions(db, records)
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    """Non-blank lines of the request body, as they arrive."""
+    pending = b""
+    async for data in request.stream():
+        *lines, pending = (pending + data).split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
+
+
+@router.get(
+    "/",
+    response_model=TransactionListResponse,
+    dependencies=[Depends(conditional_get(Transaction))],
+)
 async def list_transactions(
     category_id: int | None = None,
     type: TransactionType | None = None,
@@ -29,9 +84,13 @@ async def list_transactions(
     end_date: date | None = None,
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = None,
+    count: str = Query(default="exact", pattern="^(exact|estimated|none)$"),
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_read_db),
 ):
-    items, total = await transaction_service.list_transactions(
+    """``count=none`` (or the older ``include_total=false``) skips the total."""
+    result = await transaction_service.list_transactions_page(
         db,
         category_id=category_id,
         type=type,
@@ -39,15 +98,70 @@ async def list_transactions(
         end_date=end_date,
         page=page,
         per_page=per_page,
+        cursor=cursor,
+        count=count if include_total else "none",
+    )
+    next_cursor = (
+        transaction_service.encode_cursor(result.items[-1]) if result.has_more else None
+    )
+    return ModelResponse(
+        TransactionListResponse(
+            items=result.items,
+            total=result.total,
+            page=page,
+            per_page=per_page,
+            has_more=result.has_more,
+            next_cursor=next_cursor,
+        )
     )
-    return TransactionListResponse(items=items, total=total, page=page, per_page=per_page)
 
 
-@router.get("/{transaction_id}", response_model=TransactionResponse)
-async def get_transaction(transaction_id: int, db: AsyncSession = Depends(get_db)):
+@router.get("/export")
+async def export_transactions(
+    format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    category_id: int | None = None,
+    type: TransactionType | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Stream the full filtered history as CSV or NDJSON."""
+    batches = transaction_service.iter_transaction_batches(
+        db,
+        category_id=category_id,
+        type=type,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    if format == "ndjson":
+        return StreamingResponse(_ndjson_chunks(batches), media_type="application/x-ndjson")
+    return StreamingResponse(
+        _csv_chunks(batches),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="transactions.csv"'},
+    )
+
+
+@router.get(
+    "/{transaction_id}",
+    response_model=TransactionResponse,
+    dependencies=[Depends(conditional_get(Transaction))],
+)
+async def get_transaction(transaction_id: int, db: AsyncSession = Depends(get_read_db)):
     return await transaction_service.get_transaction(db, transaction_id)
 
 
+@router.get(
+    "/{transaction_id}/budgets",
+    response_model=list[BudgetDetailResponse],
+    dependencies=[Depends(conditional_get(Budget, Transaction))],
+)
+async def list_transaction_budgets(transaction_id: int, db: AsyncSession = Depends(get_read_db)):
+    """Budgets an expense counts towards and what remains of each; empty for income."""
+    budgets = await budget_service.list_transaction_budgets(db, transaction_id)
+    return ModelResponse(budgets, list[BudgetDetailResponse])
+
+
 @router.put("/{transaction_id}", response_model=TransactionResponse)
 async def update_transaction(
     transaction_id: int, data: TransactionUpdate, db: AsyncSession = Depends(get_db)
@@ -58,3 +172,36 @@ async def update_transaction(
 @router.delete("/{transaction_id}", status_code=204)
 async def delete_transaction(transaction_id: int, db: AsyncSession = Depends(get_db)):
     await transaction_service.delete_transaction(db, transaction_id)
+
+
+def _export_values(row) -> list:
+    return [
+        row.id,
+        row.date.isoformat(),
+        row.type.value,
+        str(row.amount),
+        row.category_id,
+        row.description,
+        row.created_at.isoformat(),
+        row.updated_at.isoformat(),
+    ]
+
+
+async def _csv_chunks(batches: AsyncIterator) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(c.key for c in transaction_service.EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(_export_values(row) for row in batch)
+        yield buffer.getvalue()
+
+
+async def _ndjson_chunks(batches: AsyncIterator) -> AsyncIterator[str]:
+    keys = [c.key for c in transaction_service.EXPORT_COLUMNS]
+    async for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(keys, _export_values(row)))) + "\n" for row in batch
+        )
@@ -1,3 +1,4 @@
+import datetime
 from decimal import Decimal
 
 from pydantic import BaseModel
@@ -34,6 +35,20 @@ class MonthlySummaryResponse(BaseModel):
     year: int
 
 
+class TimeSeriesPoint(BaseModel):
+    period_start: datetime.date
+    income: Decimal
+    expenses: Decimal
+    net: Decimal
+
+
+class TimeSeriesResponse(BaseModel):
+    granularity: str
+    start_date: datetime.date
+    end_date: datetime.date
+    items: list[TimeSeriesPoint]
+
+
 class BudgetStatusItem(BaseModel):
     budget_id: int
     budget_name: str
@@ -48,8 +63,26 @@ class BudgetStatusResponse(BaseModel):
     items: list[BudgetStatusItem]
 
 
+class TrendPeriod(BaseModel):
+    period_start: datetime.date
+    period_end: datetime.date
+    spending: Decimal
+    change_amount: Decimal | None
+    change_percentage: float | None
+
+
 class TrendResponse(BaseModel):
     current_period_spending: Decimal
     previous_period_spending: Decimal
     change_amount: Decimal
     change_percentage: float | None
+    period: str
+    items: list[TrendPeriod]
+
+
+class CacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+    data_version: int
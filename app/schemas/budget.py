@@ -1,12 +1,14 @@
 import datetime
 from decimal import Decimal
 
-from pydantic import BaseModel, ConfigDict, Field, model_validator
+from pydantic import BaseModel, ConfigDict, model_validator
+
+from app.schemas.common import PositiveAmount
 
 
 class BudgetCreate(BaseModel):
     name: str
-    amount: Decimal = Field(gt=0, decimal_places=2)
+    amount: PositiveAmount
     start_date: datetime.date
     end_date: datetime.date
     category_id: int | None = None
@@ -20,7 +22,7 @@ class BudgetCreate(BaseModel):
 
 class BudgetUpdate(BaseModel):
     name: str | None = None
-    amount: Decimal | None = Field(default=None, gt=0, decimal_places=2)
+    amount: PositiveAmount | None = None
     start_date: datetime.date | None = None
     end_date: datetime.date | None = None
     category_id: int | None = None
@@ -0,0 +1,12 @@
+from decimal import Decimal
+from typing import Annotated
+
+from pydantic import AfterValidator, Field
+
+CENT = Decimal("0.01")
+
+# Amounts are stored as NUMERIC(12, 2). Normalizing on input means a row
+# returned straight from a write serializes like one read back ("150.5" -> "150.50")
+PositiveAmount = Annotated[
+    Decimal, Field(gt=0, decimal_places=2), AfterValidator(lambda value: value.quantize(CENT))
+]
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+
+
+class PoolStatsResponse(BaseModel):
+    pool_class: str
+    size: int | None = None
+    checked_in: int | None = None
+    checked_out: int | None = None
+    overflow: int | None = None
+    wait_count: int | None = None
+    wait_seconds_total: float | None = None
+    wait_seconds_max: float | None = None
+    timeouts: int | None = None
+    # The read replica's pool, when READ_DATABASE_URL is set
+    replica: "PoolStatsResponse | None" = None
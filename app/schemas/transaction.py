@@ -1,13 +1,14 @@
 import datetime
 from decimal import Decimal
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict
 
 from app.models.transaction import TransactionType
+from app.schemas.common import PositiveAmount
 
 
 class TransactionCreate(BaseModel):
-    amount: Decimal = Field(gt=0, decimal_places=2)
+    amount: PositiveAmount
     type: TransactionType
     description: str | None = None
     date: datetime.date
@@ -15,7 +16,7 @@ class TransactionCreate(BaseModel):
 
 
 class TransactionUpdate(BaseModel):
-    amount: Decimal | None = Field(default=None, gt=0, decimal_places=2)
+    amount: PositiveAmount | None = None
     type: TransactionType | None = None
     description: str | None = None
     date: datetime.date | None = None
@@ -37,6 +38,19 @@ class TransactionResponse(BaseModel):
 
 class TransactionListResponse(BaseModel):
     items: list[TransactionResponse]
-    total: int
+    total: int | None
     page: int
     per_page: int
+    has_more: bool = False
+    next_cursor: str | None = None
+
+
+class BulkRowError(BaseModel):
+    index: int
+    errors: list[str]
+
+
+class BulkTransactionResponse(BaseModel):
+    created: int
+    ids: list[int]
+    errors: list[BulkRowError]
@@ -0,0 +1,2 @@
+# Imported for its ORM flush listener, which keeps ``daily_totals`` current.
+from app.services import rollup_service  # noqa: F401
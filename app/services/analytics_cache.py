@@ -0,0 +1,130 @@
+import functools
+import inspect
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from datetime import date
+from typing import Any, ParamSpec, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+_DIRTY_KEY = "analytics_cache_dirty"
+
+
+class AnalyticsCache:
+    """Size-bounded LRU with TTL, invalidated wholesale by a data version.
+
+    Every entry remembers the data version current when its computation
+    started; any write bumps the version, so entries computed before (or
+    during) a write are never served afterwards.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.data_version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[int, float, Any]] = OrderedDict()
+
+    def get(self, key: tuple) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            version, expires_at, value = entry
+            if version == self.data_version and expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key: tuple, version: int, value: Any) -> None:
+        if self.max_size <= 0 or version != self.data_version:
+            return
+        self._entries[key] = (version, time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def bump(self) -> None:
+        self.data_version += 1
+        self._entries.clear()
+
+    def invalidate(self, db: AsyncSession) -> None:
+        """Record a write: bump now and once more when ``db`` commits.
+
+        The second bump drops anything cached by concurrent readers between
+        the write and its commit, while it was not yet visible to them.
+        """
+        self.bump()
+        db.sync_session.info[_DIRTY_KEY] = True
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "data_version": self.data_version,
+        }
+
+
+analytics_cache = AnalyticsCache(settings.ANALYTICS_CACHE_SIZE, settings.ANALYTICS_CACHE_TTL)
+
+
+def cached(
+    *, today_dependent: bool = False
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Cache an ``async def fn(db, ...)`` service function on its other arguments.
+
+    The key includes the session's engine, so results read from a lagging
+    replica are never served to requests that read the primary.
+    ``today_dependent`` adds ``date.today()`` to the key for results that are
+    relative to the current date, so they roll over at midnight.
+    """
+
+    def decorator(fn: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            (_, db), *params = bound.arguments.items()
+            key = (
+                fn.__qualname__,
+                db.bind,
+                tuple(params),
+                date.today() if today_dependent else None,
+            )
+
+            found, value = analytics_cache.get(key)
+            if found:
+                return value
+            version = analytics_cache.data_version
+            value = await fn(*args, **kwargs)
+            analytics_cache.put(key, version, value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session: Session) -> None:
+    if session.info.pop(_DIRTY_KEY, False):
+        analytics_cache.bump()
@@ -1,12 +1,13 @@
 from datetime import date, timedelta
-from decimal import Decimal
 
-from sqlalchemy import case, extract, func, select
+from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.exceptions import ValidationException
 from app.models.budget import Budget
-from app.models.category import Category
-from app.models.transaction import Transaction, TransactionType
+from app.models.daily_total import DailyTotal
+from app.models.transaction import TransactionType
+from app.money import ZERO, Money, sql_cents
 from app.schemas.analytics import (
     BalanceResponse,
     BudgetStatusItem,
@@ -15,218 +16,357 @@ from app.schemas.analytics import (
     MonthlySummaryItem,
     MonthlySummaryResponse,
     SpendingByCategoryResponse,
+    TimeSeriesPoint,
+    TimeSeriesResponse,
+    TrendPeriod,
     TrendResponse,
 )
+from app.services.analytics_cache import cached
+from app.services.category_cache import category_directory
+from app.services.columnar_analytics import columnar_snapshot
 
+# Upper bound on the buckets one time-series response may hold.
+MAX_TIME_SERIES_BUCKETS = 1000
 
+
+@cached()
 async def get_balance(
     db: AsyncSession,
     start_date: date | None = None,
     end_date: date | None = None,
 ) -> BalanceResponse:
-    """Net balance via CASE WHEN — income and expenses in a single query."""
-    income_case = case(
-        (Transaction.type == TransactionType.INCOME, Transaction.amount),
-        else_=0,
-    )
-    expense_case = case(
-        (Transaction.type == TransactionType.EXPENSE, Transaction.amount),
-        else_=0,
-    )
-
-    query = select(
-        func.coalesce(func.sum(income_case), 0).label("total_income"),
-        func.coalesce(func.sum(expense_case), 0).label("total_expenses"),
-    )
-
-    if start_date:
-        query = query.where(Transaction.date >= start_date)
-    if end_date:
-        query = query.where(Transaction.date <= end_date)
-
-    row = (await db.execute(query)).one()
-    total_income = Decimal(str(row.total_income))
-    total_expenses = Decimal(str(row.total_expenses))
+    """Net balance via CASE WHEN over the daily rollup — income and expenses in one query."""
+    if columnar_snapshot.enabled:
+        snapshot = await columnar_snapshot.ready()
+        total_income, total_expenses = snapshot.balance(start_date, end_date)
+    else:
+        total_income, total_expenses = await _balance_totals(db, start_date, end_date)
 
     return BalanceResponse(
-        total_income=total_income,
-        total_expenses=total_expenses,
-        net_balance=total_income - total_expenses,
+        total_income=total_income.decimal,
+        total_expenses=total_expenses.decimal,
+        net_balance=(total_income - total_expenses).decimal,
     )
 
 
+@cached()
 async def get_spending_by_category(
     db: AsyncSession,
     start_date: date | None = None,
     end_date: date | None = None,
 ) -> SpendingByCategoryResponse:
     """Category breakdown with totals and percentage share."""
-    query = (
-        select(
-            Category.id.label("category_id"),
-            Category.name.label("category_name"),
-            func.coalesce(func.sum(Transaction.amount), 0).label("total"),
-        )
-        .join(Transaction, Transaction.category_id == Category.id)
-        .where(Transaction.type == TransactionType.EXPENSE)
-        .group_by(Category.id, Category.name)
-        .order_by(func.sum(Transaction.amount).desc())
-    )
-
-    if start_date:
-        query = query.where(Transaction.date >= start_date)
-    if end_date:
-        query = query.where(Transaction.date <= end_date)
-
-    rows = (await db.execute(query)).all()
-    total_spending = sum(Decimal(str(r.total)) for r in rows)
+    if columnar_snapshot.enabled:
+        snapshot = await columnar_snapshot.ready()
+        totals = snapshot.spending_by_category(start_date, end_date)
+    else:
+        totals = await _spending_rows(db, start_date, end_date)
+    names = await category_directory.names(db, (category_id for category_id, _ in totals))
+    total_spending = sum((total for _, total in totals), ZERO)
 
     items = [
         CategoryBreakdown(
-            category_id=r.category_id,
-            category_name=r.category_name,
-            total=Decimal(str(r.total)),
-            percentage=round(float(Decimal(str(r.total)) / total_spending * 100), 2)
-            if total_spending > 0
-            else 0.0,
+            category_id=category_id,
+            category_name=names[category_id],
+            total=total.decimal,
+            percentage=total.percent_of(total_spending),
         )
-        for r in rows
+        for category_id, total in totals
     ]
 
-    return SpendingByCategoryResponse(items=items, total_spending=total_spending)
+    return SpendingByCategoryResponse(items=items, total_spending=total_spending.decimal)
 
 
-async def get_monthly_summary(
+@cached()
+async def get_time_series(
     db: AsyncSession,
-    year: int,
-) -> MonthlySummaryResponse:
-    """Month-by-month income, expenses, and net using EXTRACT + GROUP BY."""
-    month_col = extract("month", Transaction.date).label("month")
-
+    start_date: date,
+    end_date: date,
+    granularity: str = "month",
+) -> TimeSeriesResponse:
+    """Income, expenses, and net per bucket over the half-open range [start_date, end_date).
+
+    Filters the rollup with plain date comparisons (index friendly), groups by
+    day in SQL and folds days into day/week/month/quarter/year buckets here;
+    buckets without any transactions are returned as zeros. Raises
+    ``ValidationException`` for ranges over ``MAX_TIME_SERIES_BUCKETS`` buckets
+    or whose last bucket ends past ``date.max``.
+    """
+    _check_time_series_range(start_date, end_date, granularity)
     income_case = case(
-        (Transaction.type == TransactionType.INCOME, Transaction.amount),
+        (DailyTotal.type == TransactionType.INCOME, DailyTotal.total),
         else_=0,
     )
     expense_case = case(
-        (Transaction.type == TransactionType.EXPENSE, Transaction.amount),
+        (DailyTotal.type == TransactionType.EXPENSE, DailyTotal.total),
         else_=0,
     )
 
     query = (
         select(
-            month_col,
-            func.coalesce(func.sum(income_case), 0).label("income"),
-            func.coalesce(func.sum(expense_case), 0).label("expenses"),
+            DailyTotal.date,
+            sql_cents(func.coalesce(func.sum(income_case), 0)).label("income"),
+            sql_cents(func.coalesce(func.sum(expense_case), 0)).label("expenses"),
+        )
+        .where(DailyTotal.date >= start_date, DailyTotal.date < end_date)
+        .group_by(DailyTotal.date)
+    )
+
+    buckets: dict[date, list[Money]] = {}
+    bucket = _bucket_start(start_date, granularity)
+    while bucket < end_date:
+        buckets[bucket] = [ZERO, ZERO]
+        bucket = _next_bucket(bucket, granularity)
+
+    if columnar_snapshot.enabled:
+        snapshot = await columnar_snapshot.ready()
+        days = snapshot.day_totals(start_date, end_date - timedelta(days=1))
+    else:
+        days = (
+            (r.date, Money(r.income), Money(r.expenses))
+            for r in (await db.execute(query)).all()
         )
-        .where(extract("year", Transaction.date) == year)
-        .group_by(month_col)
-        .order_by(month_col)
+    for day, income, expenses in days:
+        totals = buckets[_bucket_start(day, granularity)]
+        totals[0] += income
+        totals[1] += expenses
+
+    items = [
+        TimeSeriesPoint(
+            period_start=start,
+            income=income.decimal,
+            expenses=expenses.decimal,
+            net=(income - expenses).decimal,
+        )
+        for start, (income, expenses) in buckets.items()
+    ]
+    return TimeSeriesResponse(
+        granularity=granularity, start_date=start_date, end_date=end_date, items=items
     )
 
-    rows = (await db.execute(query)).all()
+
+@cached()
+async def get_monthly_summary(
+    db: AsyncSession,
+    year: int,
+) -> MonthlySummaryResponse:
+    """Month-by-month income, expenses, and net for one calendar year (all 12 months)."""
+    series = await get_time_series(db, date(year, 1, 1), date(year + 1, 1, 1), "month")
     items = [
         MonthlySummaryItem(
-            month=int(r.month),
+            month=p.period_start.month,
             year=year,
-            income=Decimal(str(r.income)),
-            expenses=Decimal(str(r.expenses)),
-            net=Decimal(str(r.income)) - Decimal(str(r.expenses)),
+            income=p.income,
+            expenses=p.expenses,
+            net=p.net,
         )
-        for r in rows
+        for p in series.items
     ]
 
     return MonthlySummaryResponse(items=items, year=year)
 
 
+@cached(today_dependent=True)
 async def get_budget_status(db: AsyncSession) -> BudgetStatusResponse:
-    """Active budgets with spent, remaining, and percentage used."""
+    """Active budgets with spent, remaining, and percentage used.
+
+    ``spent`` is maintained on the budget row by every transaction write, so
+    this is a plain indexed lookup of the active budgets. Category names come
+    from the category directory.
+    """
     today = date.today()
-    budgets_query = (
+    query = (
         select(Budget)
         .where(Budget.start_date <= today, Budget.end_date >= today)
-        .order_by(Budget.start_date)
+        .order_by(Budget.start_date, Budget.id)
+        .execution_options(populate_existing=True)
+    )
+    budgets = (await db.execute(query)).scalars().all()
+    names = await category_directory.names(
+        db, (budget.category_id for budget in budgets if budget.category_id is not None)
     )
-    budgets = (await db.execute(budgets_query)).scalars().all()
 
     items = []
     for budget in budgets:
-        # Compute spent for each budget's scope
-        spent_query = select(
-            func.coalesce(func.sum(Transaction.amount), 0)
-        ).where(
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.date >= budget.start_date,
-            Transaction.date <= budget.end_date,
-        )
-        if budget.category_id is not None:
-            spent_query = spent_query.where(Transaction.category_id == budget.category_id)
-
-        spent = Decimal(str((await db.execute(spent_query)).scalar_one()))
-        remaining = budget.amount - spent
-        pct = round(float(spent / budget.amount * 100), 2) if budget.amount > 0 else 0.0
-
-        # Fetch category name if scoped
-        cat_name = None
-        if budget.category_id is not None:
-            cat_row = await db.execute(
-                select(Category.name).where(Category.id == budget.category_id)
-            )
-            cat_name = cat_row.scalar_one_or_none()
-
+        spent, amount = Money.of(budget.spent), Money.of(budget.amount)
         items.append(
             BudgetStatusItem(
                 budget_id=budget.id,
                 budget_name=budget.name,
                 budget_amount=budget.amount,
-                category_name=cat_name,
-                spent=spent,
-                remaining=remaining,
-                percentage_used=pct,
+                category_name=names.get(budget.category_id),
+                spent=spent.decimal,
+                remaining=(amount - spent).decimal,
+                percentage_used=spent.percent_of(amount),
             )
         )
 
     return BudgetStatusResponse(items=items)
 
 
+@cached(today_dependent=True)
 async def get_trends(
     db: AsyncSession,
     period: str = "monthly",
+    periods: int = 2,
 ) -> TrendResponse:
-    """Current vs previous period spending comparison."""
+    """Spending over the last ``periods`` weeks/months with period-over-period deltas.
+
+    The current period runs up to today. All periods come from one GROUP BY
+    over the rollup, so the cost is a single round trip whatever ``periods`` is.
+    """
     today = date.today()
+    granularity = "week" if period == "weekly" else "month"
 
-    if period == "weekly":
-        current_start = today - timedelta(days=today.weekday())
-        previous_start = current_start - timedelta(weeks=1)
-        previous_end = current_start - timedelta(days=1)
-    else:  # monthly
-        current_start = today.replace(day=1)
-        if current_start.month == 1:
-            previous_start = current_start.replace(year=current_start.year - 1, month=12)
-        else:
-            previous_start = current_start.replace(month=current_start.month - 1)
-        previous_end = current_start - timedelta(days=1)
-
-    current_end = today
-
-    async def _sum_expenses(start: date, end: date) -> Decimal:
-        result = await db.execute(
-            select(func.coalesce(func.sum(Transaction.amount), 0)).where(
-                Transaction.type == TransactionType.EXPENSE,
-                Transaction.date >= start,
-                Transaction.date <= end,
-            )
+    starts = [_bucket_start(today, granularity)]
+    while len(starts) < periods:
+        starts.insert(0, _bucket_start(starts[0] - timedelta(days=1), granularity))
+
+    query = (
+        select(DailyTotal.date, sql_cents(func.sum(DailyTotal.total)).label("total"))
+        .where(
+            DailyTotal.type == TransactionType.EXPENSE,
+            DailyTotal.date >= starts[0],
+            DailyTotal.date <= today,
         )
-        return Decimal(str(result.scalar_one()))
+        .group_by(DailyTotal.date)
+    )
+    if columnar_snapshot.enabled:
+        snapshot = await columnar_snapshot.ready()
+        days = [
+            (day, expenses)
+            for day, _, expenses in snapshot.day_totals(starts[0], today, expense_only=True)
+        ]
+    else:
+        days = [(r.date, Money(r.total)) for r in (await db.execute(query)).all()]
+    spending = dict.fromkeys(starts, ZERO)
+    for day, total in days:
+        spending[_bucket_start(day, granularity)] += total
 
-    current = await _sum_expenses(current_start, current_end)
-    previous = await _sum_expenses(previous_start, previous_end)
-    change = current - previous
-    change_pct = round(float(change / previous * 100), 2) if previous > 0 else None
+    items = []
+    previous = None
+    for i, start in enumerate(starts):
+        current = spending[start]
+        end = starts[i + 1] - timedelta(days=1) if i + 1 < len(starts) else today
+        change = current - previous if previous is not None else None
+        items.append(
+            TrendPeriod(
+                period_start=start,
+                period_end=end,
+                spending=current.decimal,
+                change_amount=change.decimal if change is not None else None,
+                change_percentage=_change_percentage(change, previous),
+            )
+        )
+        previous = current
 
+    current_spending = spending[starts[-1]]
+    previous_spending = spending[starts[-2]] if len(starts) > 1 else ZERO
+    change = current_spending - previous_spending
     return TrendResponse(
-        current_period_spending=current,
-        previous_period_spending=previous,
-        change_amount=change,
-        change_percentage=change_pct,
+        current_period_spending=current_spending.decimal,
+        previous_period_spending=previous_spending.decimal,
+        change_amount=change.decimal,
+        change_percentage=_change_percentage(change, previous_spending),
+        period=period,
+        items=items,
+    )
+
+
+async def _balance_totals(
+    db: AsyncSession, start_date: date | None, end_date: date | None
+) -> tuple[Money, Money]:
+    income_case = case(
+        (DailyTotal.type == TransactionType.INCOME, DailyTotal.total),
+        else_=0,
+    )
+    expense_case = case(
+        (DailyTotal.type == TransactionType.EXPENSE, DailyTotal.total),
+        else_=0,
+    )
+
+    query = select(
+        sql_cents(func.coalesce(func.sum(income_case), 0)).label("total_income"),
+        sql_cents(func.coalesce(func.sum(expense_case), 0)).label("total_expenses"),
+    )
+
+    if start_date:
+        query = query.where(DailyTotal.date >= start_date)
+    if end_date:
+        query = query.where(DailyTotal.date <= end_date)
+
+    row = (await db.execute(query)).one()
+    return Money(row.total_income), Money(row.total_expenses)
+
+
+async def _spending_rows(
+    db: AsyncSession, start_date: date | None, end_date: date | None
+) -> list[tuple[int, Money]]:
+    query = (
+        select(
+            DailyTotal.category_id,
+            sql_cents(func.coalesce(func.sum(DailyTotal.total), 0)).label("total"),
+        )
+        .where(DailyTotal.type == TransactionType.EXPENSE)
+        .group_by(DailyTotal.category_id)
+        .having(func.sum(DailyTotal.count) > 0)
+        .order_by(func.sum(DailyTotal.total).desc())
     )
+
+    if start_date:
+        query = query.where(DailyTotal.date >= start_date)
+    if end_date:
+        query = query.where(DailyTotal.date <= end_date)
+
+    return [(r.category_id, Money(r.total)) for r in (await db.execute(query)).all()]
+
+
+def _change_percentage(change: Money | None, previous: Money | None) -> float | None:
+    if change is None or previous is None or previous.cents <= 0:
+        return None
+    return change.percent_of(previous)
+
+
+def _check_time_series_range(start_date: date, end_date: date, granularity: str) -> None:
+    first = _bucket_start(start_date, granularity)
+    last = _bucket_start(end_date - timedelta(days=1), granularity)
+    if granularity == "day":
+        count = (last - first).days + 1
+    elif granularity == "week":
+        count = (last - first).days // 7 + 1
+    else:
+        months = {"month": 1, "quarter": 3}.get(granularity, 12)
+        count = ((last.year - first.year) * 12 + last.month - first.month) // months + 1
+    if count > MAX_TIME_SERIES_BUCKETS:
+        raise ValidationException(
+            f"Range spans {count} {granularity} buckets; at most "
+            f"{MAX_TIME_SERIES_BUCKETS} are allowed"
+        )
+    try:
+        _next_bucket(last, granularity)
+    except (ValueError, OverflowError):
+        raise ValidationException(f"The last {granularity} bucket ends after {date.max}")
+
+
+def _bucket_start(day: date, granularity: str) -> date:
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "quarter":
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    return date(day.year, 1, 1)
+
+
+def _next_bucket(bucket: date, granularity: str) -> date:
+    if granularity == "day":
+        return bucket + timedelta(days=1)
+    if granularity == "week":
+        return bucket + timedelta(weeks=1)
+    if granularity == "year":
+        return date(bucket.year + 1, 1, 1)
+    months = 3 if granularity == "quarter" else 1
+    month_index = bucket.year * 12 + bucket.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
@@ -0,0 +1,117 @@
+import bisect
+import time
+from collections.abc import Iterable
+from datetime import date
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.etag import data_versions
+from app.models.budget import Budget
+
+_DIRTY_KEY = "budget_index_dirty"
+
+
+class _IntervalList:
+    """Intervals sorted by start, with a running maximum of their ends.
+
+    A stabbing query bisects on the starts and walks left only while the
+    running maximum end can still reach the queried day, so it costs
+    O(log n + k) for typical, mostly disjoint budget windows.
+    """
+
+    def __init__(self, intervals: Iterable[tuple[date, date, int]]):
+        self.intervals = sorted(intervals)
+        self.starts = [start for start, _, _ in self.intervals]
+        self.max_ends: list[date] = []
+        for _, end, _ in self.intervals:
+            self.max_ends.append(max(end, self.max_ends[-1]) if self.max_ends else end)
+
+    def overlapping(self, start: date, end: date) -> list[int]:
+        """Ids of intervals intersecting the closed range [start, end]."""
+        found = []
+        index = bisect.bisect_right(self.starts, end) - 1
+        while index >= 0 and self.max_ends[index] >= start:
+            _, interval_end, budget_id = self.intervals[index]
+            if interval_end >= start:
+                found.append(budget_id)
+            index -= 1
+        return found
+
+
+class BudgetIndex:
+    """Process-wide interval index of budget windows, grouped by category.
+
+    Global budgets (no category) live under ``None`` and apply to every
+    category. Dropped on every budget write in this process, and reloaded
+    when the ``budgets`` change counter in ``data_versions`` moves, so
+    budgets written by other workers show up once they commit. The TTL is a
+    backstop for writes that bypass the session.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.loads = 0
+        self._groups: dict[int | None, _IntervalList] | None = None
+        self._version: tuple[int, ...] | None = None
+        self._expires_at = 0.0
+
+    async def load(self, db: AsyncSession, version: tuple[int, ...] | None = None) -> None:
+        """Load every budget window; ``version`` is the counter read before loading."""
+        rows = await db.execute(
+            select(Budget.category_id, Budget.start_date, Budget.end_date, Budget.id)
+        )
+        grouped: dict[int | None, list[tuple[date, date, int]]] = {}
+        for category_id, start, end, budget_id in rows:
+            grouped.setdefault(category_id, []).append((start, end, budget_id))
+        self._groups = {key: _IntervalList(items) for key, items in grouped.items()}
+        self._version = version
+        self._expires_at = time.monotonic() + self.ttl
+        self.loads += 1
+
+    async def overlapping(
+        self, db: AsyncSession, start: date, end: date, category_id: int | None = None
+    ) -> list[int]:
+        """Ids of budgets whose window intersects [start, end].
+
+        With ``category_id``, only budgets that apply to that category: the
+        ones scoped to it plus the global ones.
+        """
+        # Read before loading: a commit landing in between only causes another reload
+        version = await data_versions.versions(db, (Budget.__tablename__,))
+        if (
+            self._groups is None
+            or version != self._version
+            or self._expires_at <= time.monotonic()
+        ):
+            await self.load(db, version)
+        keys = list(self._groups) if category_id is None else [None, category_id]
+        found: list[int] = []
+        for key in keys:
+            group = self._groups.get(key)
+            if group is not None:
+                found.extend(group.overlapping(start, end))
+        return sorted(found)
+
+    async def covering(self, db: AsyncSession, day: date, category_id: int) -> list[int]:
+        """Ids of budgets an expense on ``day`` in ``category_id`` counts towards."""
+        return await self.overlapping(db, day, day, category_id)
+
+    def clear(self) -> None:
+        self._groups = None
+
+    def invalidate(self, db: AsyncSession) -> None:
+        """Drop the index now and again when ``db`` commits."""
+        self.clear()
+        db.sync_session.info[_DIRTY_KEY] = True
+
+
+budget_index = BudgetIndex(settings.BUDGET_INDEX_TTL)
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_after_commit(session: Session) -> None:
+    if session.info.pop(_DIRTY_KEY, False):
+        budget_index.clear()
@@ -1,19 +1,29 @@
 from decimal import Decimal
 
-from sqlalchemy import func, select
+from sqlalchemy import delete, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.exceptions import NotFoundException
+from app.exceptions import NotFoundException, ValidationException
 from app.models.budget import Budget
-from app.models.transaction import Transaction, TransactionType
+from app.models.transaction import TransactionType
+from app.money import Money
 from app.schemas.budget import BudgetCreate, BudgetDetailResponse, BudgetUpdate
+from app.services import rollup_service, transaction_service
+from app.services.analytics_cache import analytics_cache
+from app.services.budget_index import budget_index
+from app.services.category_cache import category_directory
+
+INVALID_DATES = "end_date must be after start_date"
 
 
 async def create_budget(db: AsyncSession, data: BudgetCreate) -> Budget:
+    if data.category_id is not None:
+        await category_directory.require(db, data.category_id)
     budget = Budget(**data.model_dump())
     db.add(budget)
     await db.flush()
-    await db.refresh(budget)
+    analytics_cache.invalidate(db)
+    budget_index.invalidate(db)
     return budget
 
 
@@ -25,16 +35,45 @@ async def get_budget(db: AsyncSession, budget_id: int) -> Budget:
 
 
 async def get_budget_detail(db: AsyncSession, budget_id: int) -> BudgetDetailResponse:
-    budget = await get_budget(db, budget_id)
-    spent = await _compute_spent(db, budget)
-    remaining = budget.amount - spent
-    percentage_used = float(spent / budget.amount * 100) if budget.amount > 0 else 0.0
+    # spent is maintained in the database; don't trust a copy already loaded
+    budget = await db.get(Budget, budget_id, populate_existing=True)
+    if not budget:
+        raise NotFoundException("Budget", budget_id)
+    return _detail(budget)
+
+
+async def list_transaction_budgets(
+    db: AsyncSession, transaction_id: int
+) -> list[BudgetDetailResponse]:
+    """Budgets the transaction counts towards, with what is left of each."""
+    transaction = await transaction_service.get_transaction(db, transaction_id)
+    if transaction.type != TransactionType.EXPENSE:
+        return []
+    ids = await budget_index.covering(db, transaction.date, transaction.category_id)
+    if not ids:
+        return []
+    # The index may lag other workers' writes; re-check the scope on the rows
+    result = await db.execute(
+        select(Budget)
+        .where(
+            Budget.id.in_(ids),
+            Budget.start_date <= transaction.date,
+            Budget.end_date >= transaction.date,
+            or_(Budget.category_id.is_(None), Budget.category_id == transaction.category_id),
+        )
+        .order_by(Budget.start_date, Budget.id)
+        .execution_options(populate_existing=True)
+    )
+    return [_detail(budget) for budget in result.scalars()]
 
+
+def _detail(budget: Budget) -> BudgetDetailResponse:
+    spent, amount = Money.of(budget.spent), Money.of(budget.amount)
     return BudgetDetailResponse(
-        **{c.name: getattr(budget, c.name) for c in budget.__table__.columns},
-        spent=spent,
-        remaining=remaining,
-        percentage_used=round(percentage_used, 2),
+        **{c.name: getattr(budget, c.name) for c in budget.__table__.columns if c.name != "spent"},
+        spent=spent.decimal,
+        remaining=(amount - spent).decimal,
+        percentage_used=spent.percent_of(amount),
     )
 
 
@@ -44,35 +83,57 @@ async def list_budgets(db: AsyncSession) -> list[Budget]:
 
 
 async def update_budget(db: AsyncSession, budget_id: int, data: BudgetUpdate) -> Budget:
-    budget = await get_budget(db, budget_id)
-    update_data = data.model_dump(exclude_unset=True)
-
-    for field, value in update_data.items():
-        setattr(budget, field, value)
-
-    # Validate dates after update
-    if budget.end_date <= budget.start_date:
-        raise ValueError("end_date must be after start_date")
-
-    await db.flush()
-    await db.refresh(budget)
+    changes = data.model_dump(exclude_unset=True)
+    if not changes:
+        return await get_budget(db, budget_id)
+    if changes.get("category_id") is not None:
+        await category_directory.require(db, changes["category_id"])
+
+    # Validate dates in the UPDATE itself when only one side changes
+    start_date, end_date = changes.get("start_date"), changes.get("end_date")
+    conditions = []
+    if start_date is not None and end_date is not None:
+        if end_date <= start_date:
+            raise ValidationException(INVALID_DATES)
+    elif start_date is not None:
+        conditions.append(Budget.end_date > start_date)
+    elif end_date is not None:
+        conditions.append(Budget.start_date < end_date)
+
+    values = dict(changes)
+    if changes.keys() & {"start_date", "end_date", "category_id"}:
+        # In SET, the columns still hold the old values
+        values["spent"] = rollup_service.spent_expression(
+            changes.get("start_date", Budget.start_date),
+            changes.get("end_date", Budget.end_date),
+            changes["category_id"] if "category_id" in changes else Budget.category_id,
+        )
+
+    budget = await db.scalar(
+        update(Budget)
+        .where(Budget.id == budget_id, *conditions)
+        .values(**values)
+        .returning(Budget)
+    )
+    if budget is None:
+        await get_budget(db, budget_id)
+        raise ValidationException(INVALID_DATES)
+    analytics_cache.invalidate(db)
+    budget_index.invalidate(db)
     return budget
 
 
 async def delete_budget(db: AsyncSession, budget_id: int) -> None:
-    budget = await get_budget(db, budget_id)
-    await db.delete(budget)
-    await db.flush()
+    deleted = await db.scalar(delete(Budget).where(Budget.id == budget_id).returning(Budget.id))
+    if deleted is None:
+        raise NotFoundException("Budget", budget_id)
+    analytics_cache.invalidate(db)
+    budget_index.invalidate(db)
 
 
 async def _compute_spent(db: AsyncSession, budget: Budget) -> Decimal:
-    query = select(func.coalesce(func.sum(Transaction.amount), 0)).where(
-        Transaction.type == TransactionType.EXPENSE,
-        Transaction.date >= budget.start_date,
-        Transaction.date <= budget.end_date,
+    """Sum the covered expenses from scratch (``budget.spent`` is the maintained copy)."""
+    expression = rollup_service.spent_expression(
+        budget.start_date, budget.end_date, budget.category_id
     )
-    if budget.category_id is not None:
-        query = query.where(Transaction.category_id == budget.category_id)
-
-    result = await db.execute(query)
-    return result.scalar_one()
+    return (await db.execute(select(expression))).scalar_one()
@@ -0,0 +1,75 @@
+import time
+from collections.abc import Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.exceptions import ValidationException
+from app.models.category import Category
+
+_DIRTY_KEY = "category_directory_dirty"
+
+
+class CategoryDirectory:
+    """Process-wide id -> name map of all categories.
+
+    Loaded at startup (or lazily on first use) and dropped on every category
+    write in this process. Writes made by other processes are picked up when
+    the TTL expires, or immediately for a new id because a miss reloads once
+    before reporting the category as missing.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.loads = 0
+        self._names: dict[int, str] | None = None
+        self._expires_at = 0.0
+
+    async def load(self, db: AsyncSession) -> dict[int, str]:
+        rows = await db.execute(select(Category.id, Category.name))
+        self._names = dict(rows.all())
+        self._expires_at = time.monotonic() + self.ttl
+        self.loads += 1
+        return self._names
+
+    async def names(self, db: AsyncSession, expected: Iterable[int] = ()) -> dict[int, str]:
+        """The directory, reloaded if stale or missing any of ``expected``."""
+        if (
+            self._names is None
+            or self._expires_at <= time.monotonic()
+            or not self._names.keys() >= set(expected)
+        ):
+            return await self.load(db)
+        return self._names
+
+    async def existing(self, db: AsyncSession, category_ids: Iterable[int]) -> set[int]:
+        """The subset of ``category_ids`` that exist; reloads at most once."""
+        ids = set(category_ids)
+        return ids & (await self.names(db, ids)).keys()
+
+    async def exists(self, db: AsyncSession, category_id: int) -> bool:
+        return bool(await self.existing(db, (category_id,)))
+
+    async def require(self, db: AsyncSession, category_id: int) -> None:
+        """Raise ``ValidationException`` (422) for an unknown ``category_id``."""
+        if not await self.exists(db, category_id):
+            raise ValidationException(f"category_id: Category with id {category_id} not found")
+
+    def clear(self) -> None:
+        self._names = None
+
+    def invalidate(self, db: AsyncSession) -> None:
+        """Drop the directory now and again when ``db`` commits."""
+        self.clear()
+        db.sync_session.info[_DIRTY_KEY] = True
+
+
+category_directory = CategoryDirectory(settings.CATEGORY_CACHE_TTL)
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_after_commit(session: Session) -> None:
+    if session.info.pop(_DIRTY_KEY, False):
+        category_directory.clear()
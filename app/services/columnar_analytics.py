@@ -0,0 +1,226 @@
+import time
+from collections.abc import Callable, Iterable
+from datetime import date
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import async_session
+from app.models.daily_total import DailyTotal
+from app.models.transaction import TransactionType
+from app.money import Money
+
+try:
+    import numpy as np
+except ImportError:  # optional: pip install "expense-tracker-api[columnar]"
+    np = None
+
+_PENDING_KEY = "columnar_pending"
+_STALE_KEY = "columnar_stale"
+
+# Column order of a snapshot row: day ordinal, category id, type, cents, count
+_DTYPES = ("int32", "int32", "uint8", "int64", "int64")
+_TYPE_CODES = {TransactionType.INCOME: 0, TransactionType.EXPENSE: 1}
+_EXPENSE = _TYPE_CODES[TransactionType.EXPENSE]
+
+
+class ColumnarSnapshot:
+    """Columnar in-memory copy of ``daily_totals`` for vectorized analytics.
+
+    Base columns are sorted by day, so a date range is two ``searchsorted``
+    calls; totals are int64 cents and are summed exactly. Writes committed in
+    this process are appended as signed delta rows (the same deltas the
+    rollup upsert applies) and folded into the base once there are enough of
+    them. Writes the process cannot express as deltas, and the TTL, make the
+    next query reload.
+
+    Loads always go through a fresh primary session from ``session_factory``,
+    never the caller's: a replica may lag commits whose deltas are dropped
+    with the old base, and a session with staged deltas would see its own
+    uncommitted rows and count them twice.
+    """
+
+    MERGE_THRESHOLD = 4096
+
+    def __init__(
+        self, enabled: bool, ttl: float, session_factory: Callable[[], AsyncSession]
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.session_factory = session_factory
+        self.loads = 0
+        self._base: tuple | None = None
+        self._delta: list[tuple[int, int, int, int, int]] = []
+        self._delta_columns: tuple | None = None
+        self._commits = 0
+        self._expires_at = 0.0
+
+    async def ready(self) -> "ColumnarSnapshot":
+        """The snapshot, (re)loaded first when missing or expired."""
+        if self._base is None or self._expires_at <= time.monotonic():
+            await self.load()
+        return self
+
+    async def load(self) -> None:
+        if np is None:
+            raise RuntimeError("ANALYTICS_ENGINE=numpy requires numpy to be installed")
+        commits = self._commits
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(
+                    DailyTotal.date,
+                    DailyTotal.category_id,
+                    DailyTotal.type,
+                    DailyTotal.total,
+                    DailyTotal.count,
+                ).order_by(DailyTotal.date)
+            )
+            self._base = _columns(
+                (day.toordinal(), category_id, _TYPE_CODES[type_], Money.of(total).cents, count)
+                for day, category_id, type_, total, count in result
+            )
+        self._delta = []
+        self._delta_columns = None
+        # A commit landing while the SELECT ran may be missing from it: reload next time
+        fresh = self._commits == commits
+        self._expires_at = time.monotonic() + self.ttl if fresh else 0.0
+        self.loads += 1
+
+    def clear(self) -> None:
+        self._base = None
+        self._delta = []
+        self._delta_columns = None
+
+    def stage(self, session: Session, params: Iterable[dict]) -> None:
+        """Remember rollup deltas written by ``session``; applied when it commits."""
+        if not self.enabled:
+            return
+        session.info.setdefault(_PENDING_KEY, []).extend(
+            (
+                p["date"].toordinal(),
+                p["category_id"],
+                _TYPE_CODES[p["type"]],
+                Money.of(p["total"]).cents,
+                p["count"],
+            )
+            for p in params
+        )
+
+    def mark_stale(self, session: Session) -> None:
+        """``session`` changed the rollup in a way with no deltas; reload after commit."""
+        if self.enabled:
+            session.info[_STALE_KEY] = True
+
+    def balance(self, start: date | None, end: date | None) -> tuple[Money, Money]:
+        """Income and expenses over the closed range [start, end]."""
+        _, _, types, cents, _ = self._select(start, end)
+        expense = types == _EXPENSE
+        return Money(int(cents[~expense].sum())), Money(int(cents[expense].sum()))
+
+    def spending_by_category(
+        self, start: date | None, end: date | None
+    ) -> list[tuple[int, Money]]:
+        """Expense total per category with any expenses, largest first."""
+        _, categories, types, cents, counts = self._select(start, end)
+        expense = types == _EXPENSE
+        keys, totals, counts = _group_sums(categories[expense], cents[expense], counts[expense])
+        keep = counts > 0
+        keys, totals = keys[keep], totals[keep]
+        order = np.lexsort((keys, -totals))
+        return [(int(keys[i]), Money(int(totals[i]))) for i in order]
+
+    def day_totals(
+        self, start: date, end: date, expense_only: bool = False
+    ) -> list[tuple[date, Money, Money]]:
+        """``(day, income, expenses)`` for each day in [start, end] with rollup rows."""
+        days, _, types, cents, _ = self._select(start, end)
+        expense = types == _EXPENSE
+        if expense_only:
+            days, cents, expense = days[expense], cents[expense], expense[expense]
+        keys, income, expenses = _group_sums(
+            days, np.where(expense, 0, cents), np.where(expense, cents, 0)
+        )
+        return [
+            (date.fromordinal(int(day)), Money(int(i)), Money(int(e)))
+            for day, i, e in zip(keys, income, expenses)
+        ]
+
+    def _committed(self, rows: list[tuple[int, int, int, int, int]], stale: bool) -> None:
+        self._commits += 1
+        if stale:
+            self.clear()
+        if self._base is None or not rows:
+            return
+        self._delta.extend(rows)
+        self._delta_columns = None
+        if len(self._delta) >= self.MERGE_THRESHOLD:
+            merged = [np.concatenate(pair) for pair in zip(self._base, _columns(self._delta))]
+            order = np.argsort(merged[0], kind="stable")
+            self._base = tuple(column[order] for column in merged)
+            self._delta = []
+
+    def _select(self, start: date | None, end: date | None) -> tuple:
+        """Snapshot rows with a day in [start, end]: a base slice plus matching deltas."""
+        days = self._base[0]
+        lo = 0 if start is None else np.searchsorted(days, start.toordinal(), "left")
+        hi = len(days) if end is None else np.searchsorted(days, end.toordinal(), "right")
+        selected = tuple(column[lo:hi] for column in self._base)
+        if not self._delta:
+            return selected
+
+        if self._delta_columns is None:
+            self._delta_columns = _columns(self._delta)
+        delta_days = self._delta_columns[0]
+        mask = np.ones(len(delta_days), dtype=bool)
+        if start is not None:
+            mask &= delta_days >= start.toordinal()
+        if end is not None:
+            mask &= delta_days <= end.toordinal()
+        return tuple(
+            np.concatenate((column, delta[mask]))
+            for column, delta in zip(selected, self._delta_columns)
+        )
+
+
+def _columns(rows: Iterable[tuple]) -> tuple:
+    rows = list(rows)
+    return tuple(
+        np.fromiter((row[i] for row in rows), dtype=dtype, count=len(rows))
+        for i, dtype in enumerate(_DTYPES)
+    )
+
+
+def _group_sums(keys, *values) -> tuple:
+    """Distinct ``keys`` (ascending) and the int64 sum of each ``values`` column per key.
+
+    Sort plus ``np.add.reduceat`` keeps the sums in integers, where
+    ``np.bincount`` weights would go through float64.
+    """
+    if len(keys) == 0:
+        return (keys, *(np.zeros(0, dtype=np.int64) for _ in values))
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    sums = tuple(np.add.reduceat(column[order].astype(np.int64), starts) for column in values)
+    return (keys[starts], *sums)
+
+
+columnar_snapshot = ColumnarSnapshot(
+    settings.ANALYTICS_ENGINE == "numpy", settings.ANALYTICS_SNAPSHOT_TTL, async_session
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    stale = session.info.pop(_STALE_KEY, False)
+    if pending or stale:
+        columnar_snapshot._committed(pending or [], stale)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_STALE_KEY, None)
@@ -0,0 +1,219 @@
+from collections.abc import Iterable
+from datetime import date
+from decimal import Decimal
+from typing import NamedTuple
+
+from sqlalchemy import (
+    ColumnElement,
+    ScalarSelect,
+    bindparam,
+    delete,
+    event,
+    func,
+    inspect,
+    insert,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import QueryableAttribute, Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.budget import Budget
+from app.models.daily_total import DailyTotal
+from app.models.transaction import Transaction, TransactionType
+from app.money import ZERO, Money
+from app.services.columnar_analytics import columnar_snapshot
+
+_ROLLUP_FIELDS = ("date", "category_id", "type", "amount")
+_BUDGET_SCOPE_FIELDS = ("start_date", "end_date", "category_id")
+
+
+class LedgerEntry(NamedTuple):
+    """The parts of a transaction that feed the daily rollup."""
+
+    date: date
+    category_id: int
+    type: TransactionType
+    amount: Decimal
+
+    @classmethod
+    def from_transaction(cls, txn: Transaction) -> "LedgerEntry":
+        return cls(txn.date, txn.category_id, txn.type, txn.amount)
+
+
+def apply_changes(
+    session: Session,
+    removed: Iterable[LedgerEntry] = (),
+    added: Iterable[LedgerEntry] = (),
+) -> None:
+    """Fold removed/added transactions into ``daily_totals`` and ``budgets.spent``.
+
+    One upsert for the rollup, plus one UPDATE per changed expense day and
+    category for the budgets covering it. Runs on the session's current
+    connection, so both commit or roll back together with the write that
+    produced the changes. Call it through ``AsyncSession.run_sync`` from
+    async code.
+    """
+    deltas: dict[tuple, list] = {}
+    for sign, entries in ((-1, removed), (1, added)):
+        for entry in entries:
+            delta = deltas.setdefault((entry.date, entry.category_id, entry.type), [ZERO, 0])
+            delta[0] += sign * Money.of(entry.amount)
+            delta[1] += sign
+
+    params = [
+        {"date": d, "category_id": c, "type": t, "total": total.decimal, "count": count}
+        for (d, c, t), (total, count) in deltas.items()
+        if total or count
+    ]
+    if not params:
+        return
+
+    connection = session.connection()
+    connection.execute(_upsert_statement(connection.dialect.name), params)
+    columnar_snapshot.stage(session, params)
+
+    spent_params = [
+        {"day": p["date"], "day_category_id": p["category_id"], "delta": p["total"]}
+        for p in params
+        if p["type"] == TransactionType.EXPENSE and p["total"]
+    ]
+    if spent_params:
+        connection.execute(_SPENT_DELTA_STATEMENT, spent_params)
+
+
+def spent_expression(start_date, end_date, category_id) -> ScalarSelect:
+    """Total of the expenses a budget covers, as a scalar subquery.
+
+    Arguments are values or budget columns, so the same expression fills
+    ``spent`` on INSERT, on UPDATE and when repairing.
+    """
+    conditions = [
+        Transaction.type == TransactionType.EXPENSE,
+        Transaction.date >= start_date,
+        Transaction.date <= end_date,
+    ]
+    if isinstance(category_id, (ColumnElement, QueryableAttribute)):
+        conditions.append(
+            or_(category_id.is_(None), Transaction.category_id == category_id)
+        )
+    elif category_id is not None:
+        conditions.append(Transaction.category_id == category_id)
+    return (
+        select(func.coalesce(func.sum(Transaction.amount), 0))
+        .where(*conditions)
+        .scalar_subquery()
+    )
+
+
+async def rebuild_budget_spent(db: AsyncSession) -> int:
+    """Recompute ``budgets.spent`` from ``transactions``; returns budgets corrected."""
+    recomputed = spent_expression(Budget.start_date, Budget.end_date, Budget.category_id)
+    result = await db.execute(
+        update(Budget)
+        .where(Budget.spent != recomputed)
+        .values(spent=recomputed)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def rebuild_daily_totals(db: AsyncSession) -> int:
+    """Recompute the whole rollup from ``transactions``; returns rows written."""
+    await db.execute(delete(DailyTotal))
+    columnar_snapshot.mark_stale(db.sync_session)
+    grouped = select(
+        Transaction.date,
+        Transaction.category_id,
+        Transaction.type,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id),
+    ).group_by(Transaction.date, Transaction.category_id, Transaction.type)
+    await db.execute(
+        insert(DailyTotal).from_select(["date", "category_id", "type", "total", "count"], grouped)
+    )
+    return (await db.execute(select(func.count()).select_from(DailyTotal))).scalar_one()
+
+
+_SPENT_DELTA_STATEMENT = (
+    update(Budget.__table__)
+    .where(
+        Budget.start_date <= bindparam("day"),
+        Budget.end_date >= bindparam("day"),
+        or_(Budget.category_id.is_(None), Budget.category_id == bindparam("day_category_id")),
+    )
+    .values(spent=Budget.spent + bindparam("delta"))
+)
+
+
+def _upsert_statement(dialect_name: str, source=lambda stmt: stmt):
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = source(dialect_insert(DailyTotal.__table__))
+    return stmt.on_conflict_do_update(
+        index_elements=["date", "category_id", "type"],
+        set_={
+            "total": DailyTotal.__table__.c.total + stmt.excluded.total,
+            "count": DailyTotal.__table__.c.count + stmt.excluded.count,
+        },
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _track_transaction_changes(session: Session, flush_context) -> None:
+    """Keep the rollup current for transactions written through the ORM."""
+    removed: list[LedgerEntry] = []
+    added: list[LedgerEntry] = []
+
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            added.append(LedgerEntry.from_transaction(obj))
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            removed.append(LedgerEntry.from_transaction(obj))
+    for obj in session.dirty:
+        if not isinstance(obj, Transaction):
+            continue
+        state = inspect(obj)
+        histories = {f: state.attrs[f].history for f in _ROLLUP_FIELDS}
+        if not any(h.has_changes() for h in histories.values()):
+            continue
+        old = {f: h.deleted[0] if h.deleted else getattr(obj, f) for f, h in histories.items()}
+        removed.append(LedgerEntry(**old))
+        added.append(LedgerEntry.from_transaction(obj))
+
+    if removed or added:
+        apply_changes(session, removed, added)
+
+    # A budget written in the same flush as expenses may or may not have seen
+    # them when its spent was computed; recompute it now that all are in
+    rescoped = [
+        obj
+        for obj in (*session.new, *session.dirty)
+        if isinstance(obj, Budget) and obj.id is not None
+    ]
+    if rescoped and (removed or added):
+        table = Budget.__table__
+        rows = session.connection().execute(
+            update(table)
+            .where(table.c.id.in_([b.id for b in rescoped]))
+            .values(spent=spent_expression(table.c.start_date, table.c.end_date, table.c.category_id))
+            .returning(table.c.id, table.c.spent)
+        )
+        spent_by_id = dict(rows.all())
+        for budget in rescoped:
+            set_committed_value(budget, "spent", spent_by_id[budget.id])
+
+
+@event.listens_for(Budget, "before_insert")
+def _fill_spent(mapper, connection, budget: Budget) -> None:
+    budget.spent = spent_expression(budget.start_date, budget.end_date, budget.category_id)
+
+
+@event.listens_for(Budget, "before_update")
+def _refill_spent(mapper, connection, budget: Budget) -> None:
+    state = inspect(budget)
+    if any(state.attrs[f].history.has_changes() for f in _BUDGET_SCOPE_FIELDS):
+        budget.spent = spent_expression(budget.start_date, budget.end_date, budget.category_id)
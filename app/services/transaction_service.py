@@ -1,21 +1,160 @@
+import base64
+import binascii
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Sequence
 from datetime import date
+from typing import Any, NamedTuple
 
-from sqlalchemy import func, select
+from pydantic import ValidationError as PydanticValidationError
+from sqlalchemy import ColumnElement, Row, delete, func, insert, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.exceptions import NotFoundException
+from app.exceptions import NotFoundException, ValidationException
+from app.models.daily_total import DailyTotal
 from app.models.transaction import Transaction, TransactionType
-from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.schemas.transaction import (
+    BulkRowError,
+    BulkTransactionResponse,
+    TransactionCreate,
+    TransactionUpdate,
+)
+from app.services import rollup_service
+from app.services.analytics_cache import analytics_cache
+from app.services.category_cache import category_directory
+
+# Rows validated and inserted together (one multi-row INSERT ... RETURNING)
+# in bulk ingestion.
+BULK_CHUNK_SIZE = 1000
+
+# Rows fetched per server-side cursor round trip when exporting.
+EXPORT_BATCH_SIZE = 1000
+
+# How list_transactions_page computes the total.
+COUNT_MODES = ("exact", "estimated", "none")
+
+EXPORT_COLUMNS = (
+    Transaction.id,
+    Transaction.date,
+    Transaction.type,
+    Transaction.amount,
+    Transaction.category_id,
+    Transaction.description,
+    Transaction.created_at,
+    Transaction.updated_at,
+)
 
 
 async def create_transaction(db: AsyncSession, data: TransactionCreate) -> Transaction:
+    await category_directory.require(db, data.category_id)
     txn = Transaction(**data.model_dump())
     db.add(txn)
     await db.flush()
-    await db.refresh(txn)
+    analytics_cache.invalidate(db)
     return txn
 
 
+async def create_transactions(
+    db: AsyncSession, items: Sequence[TransactionCreate]
+) -> list[Transaction]:
+    """Insert already validated rows in one multi-row INSERT ... RETURNING.
+
+    Categories are not checked here. Rows come back in the order given.
+    """
+    if not items:
+        return []
+    rows = [data.model_dump() for data in items]
+    result = await db.scalars(
+        insert(Transaction).returning(Transaction, sort_by_parameter_order=True), rows
+    )
+    created = list(result.all())
+    entries = [
+        rollup_service.LedgerEntry(r["date"], r["category_id"], r["type"], r["amount"])
+        for r in rows
+    ]
+    await db.run_sync(rollup_service.apply_changes, (), entries)
+    analytics_cache.invalidate(db)
+    return created
+
+
+async def bulk_create_transactions(
+    db: AsyncSession, records: Iterable[Any] | AsyncIterable[Any]
+) -> BulkTransactionResponse:
+    """Validate and insert records ``BULK_CHUNK_SIZE`` at a time, as they arrive.
+
+    Records are either decoded JSON values (array elements) or raw JSON
+    documents as ``bytes`` (one NDJSON line each), from a list or an async
+    stream; only one chunk is held at a time. Rows that fail validation,
+    including array elements that are not objects, or that reference an
+    unknown category are reported by their position in the input and are not
+    inserted. ``ids`` follow the input order.
+    """
+    errors: dict[int, list[str]] = {}
+    ids: list[int] = []
+    stmt = insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True)
+    offset = 0
+    async for chunk in _chunks(records, BULK_CHUNK_SIZE):
+        valid: list[tuple[int, TransactionCreate]] = []
+        for index, record in enumerate(chunk, offset):
+            try:
+                if isinstance(record, bytes):
+                    valid.append((index, TransactionCreate.model_validate_json(record)))
+                else:
+                    valid.append((index, TransactionCreate.model_validate(record)))
+            except PydanticValidationError as exc:
+                errors[index] = [
+                    f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}"
+                    for err in exc.errors(include_url=False)
+                ]
+        offset += len(chunk)
+
+        known = await category_directory.existing(db, (data.category_id for _, data in valid))
+        rows = []
+        for index, data in valid:
+            if data.category_id in known:
+                rows.append(data.model_dump())
+            else:
+                errors[index] = [f"category_id: Category with id {data.category_id} not found"]
+        if not rows:
+            continue
+
+        result = await db.execute(stmt, rows)
+        ids.extend(result.scalars().all())
+        # Core inserts bypass the flush listener, so feed the rollup directly
+        entries = [
+            rollup_service.LedgerEntry(r["date"], r["category_id"], r["type"], r["amount"])
+            for r in rows
+        ]
+        await db.run_sync(rollup_service.apply_changes, (), entries)
+
+    if ids:
+        analytics_cache.invalidate(db)
+    return BulkTransactionResponse(
+        created=len(ids),
+        ids=ids,
+        errors=[BulkRowError(index=i, errors=errors[i]) for i in sorted(errors)],
+    )
+
+
+async def _chunks(
+    records: Iterable[Any] | AsyncIterable[Any], size: int
+) -> AsyncIterator[list[Any]]:
+    """Lists of up to ``size`` consecutive records."""
+    chunk: list[Any] = []
+    if isinstance(records, AsyncIterable):
+        async for record in records:
+            chunk.append(record)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    else:
+        for record in records:
+            chunk.append(record)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
 async def get_transaction(db: AsyncSession, transaction_id: int) -> Transaction:
     txn = await db.get(Transaction, transaction_id)
     if not txn:
@@ -23,6 +162,74 @@ async def get_transaction(db: AsyncSession, transaction_id: int) -> Transaction:
     return txn
 
 
+class TransactionPage(NamedTuple):
+    items: list[Transaction]
+    total: int | None
+    has_more: bool
+
+
+async def list_transactions_page(
+    db: AsyncSession,
+    *,
+    category_id: int | None = None,
+    type: TransactionType | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    page: int = 1,
+    per_page: int = 20,
+    cursor: str | None = None,
+    count: str = "exact",
+) -> TransactionPage:
+    """Newest-first page of transactions, ordered by (date, id) descending.
+
+    With ``cursor`` the page starts right after the row the cursor was built
+    from (keyset pagination) and ``page`` is ignored, so deep pages cost the
+    same as the first one. ``has_more`` comes from fetching one extra row.
+
+    ``count`` picks how ``total`` is computed: ``exact`` counts the filtered
+    rows (skipped when the page itself shows where the results end),
+    ``estimated`` sums the ``daily_totals`` rollup, whose keys cover every
+    filter, and ``none`` leaves it ``None``.
+    """
+    if count not in COUNT_MODES:
+        raise ValidationException(f"count must be one of: {', '.join(COUNT_MODES)}")
+    filter_args = dict(
+        category_id=category_id, type=type, start_date=start_date, end_date=end_date
+    )
+    filters = _build_filters(Transaction, **filter_args)
+
+    offset = 0
+    query = (
+        select(Transaction)
+        .where(*filters)
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+        .limit(per_page + 1)
+    )
+    if cursor is not None:
+        query = query.where(tuple_(Transaction.date, Transaction.id) < decode_cursor(cursor))
+    else:
+        offset = (page - 1) * per_page
+        query = query.offset(offset)
+
+    rows = list((await db.execute(query)).scalars().all())
+    items, has_more = rows[:per_page], len(rows) > per_page
+
+    total = None
+    if count == "exact":
+        if cursor is None and not has_more and (items or offset == 0):
+            total = offset + len(items)
+        else:
+            count_query = select(func.count(Transaction.id)).where(*filters)
+            total = (await db.execute(count_query)).scalar_one()
+    elif count == "estimated":
+        rollup_query = select(func.coalesce(func.sum(DailyTotal.count), 0)).where(
+            *_build_filters(DailyTotal, **filter_args)
+        )
+        total = int((await db.execute(rollup_query)).scalar_one())
+
+    return TransactionPage(items, total, has_more)
+
+
 async def list_transactions(
     db: AsyncSession,
     *,
@@ -32,42 +239,149 @@ async def list_transactions(
     end_date: date | None = None,
     page: int = 1,
     per_page: int = 20,
-) -> tuple[list[Transaction], int]:
-    query = select(Transaction)
-    count_query = select(func.count(Transaction.id))
+    cursor: str | None = None,
+    include_total: bool = True,
+) -> tuple[list[Transaction], int | None]:
+    """``list_transactions_page`` returning ``(items, total)``.
+
+    ``include_total=False`` skips the count and returns ``None`` as the total.
+    """
+    result = await list_transactions_page(
+        db,
+        category_id=category_id,
+        type=type,
+        start_date=start_date,
+        end_date=end_date,
+        page=page,
+        per_page=per_page,
+        cursor=cursor,
+        count="exact" if include_total else "none",
+    )
+    return result.items, result.total
+
+
+async def iter_transaction_batches(
+    db: AsyncSession,
+    *,
+    category_id: int | None = None,
+    type: TransactionType | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[Sequence[Row]]:
+    """Yield filtered transaction rows in fixed-size batches.
+
+    Rows are read through a server-side cursor as plain column tuples, so
+    memory stays bounded by ``batch_size`` however many rows match.
+    """
+    filters = _build_filters(
+        Transaction,
+        category_id=category_id,
+        type=type,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    query = (
+        select(*EXPORT_COLUMNS)
+        .where(*filters)
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream(query)
+    async for batch in result.partitions():
+        yield batch
 
+
+def encode_cursor(txn: Transaction) -> str:
+    """Opaque keyset cursor pointing just past ``txn`` in list order."""
+    raw = f"{txn.date.isoformat()}:{txn.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        day, _, txn_id = raw.partition(":")
+        return date.fromisoformat(day), int(txn_id)
+    except (ValueError, binascii.Error) as exc:
+        raise ValidationException("Invalid pagination cursor") from exc
+
+
+def _build_filters(
+    entity: type[Transaction] | type[DailyTotal],
+    *,
+    category_id: int | None,
+    type: TransactionType | None,
+    start_date: date | None,
+    end_date: date | None,
+) -> list[ColumnElement[bool]]:
+    filters = []
     if category_id is not None:
-        query = query.where(Transaction.category_id == category_id)
-        count_query = count_query.where(Transaction.category_id == category_id)
+        filters.append(entity.category_id == category_id)
     if type is not None:
-        query = query.where(Transaction.type == type)
-        count_query = count_query.where(Transaction.type == type)
+        filters.append(entity.type == type)
     if start_date is not None:
-        query = query.where(Transaction.date >= start_date)
-        count_query = count_query.where(Transaction.date >= start_date)
+        filters.append(entity.date >= start_date)
     if end_date is not None:
-        query = query.where(Transaction.date <= end_date)
-        count_query = count_query.where(Transaction.date <= end_date)
-
-    total = (await db.execute(count_query)).scalar_one()
-
-    query = query.order_by(Transaction.date.desc()).offset((page - 1) * per_page).limit(per_page)
-    result = await db.execute(query)
-    return list(result.scalars().all()), total
+        filters.append(entity.date <= end_date)
+    return filters
 
 
 async def update_transaction(
     db: AsyncSession, transaction_id: int, data: TransactionUpdate
 ) -> Transaction:
-    txn = await get_transaction(db, transaction_id)
-    for field, value in data.model_dump(exclude_unset=True).items():
-        setattr(txn, field, value)
-    await db.flush()
-    await db.refresh(txn)
+    changes = data.model_dump(exclude_unset=True)
+    if not changes:
+        return await get_transaction(db, transaction_id)
+    if changes.get("category_id") is not None:
+        await category_directory.require(db, changes["category_id"])
+
+    # The ORM flush listener never sees Core-style writes, so move the rollup
+    # and budget contributions explicitly. Only fields feeding them need the old
+    # values, read FOR UPDATE so no other writer moves the row in between.
+    old = None
+    if changes.keys() & set(rollup_service.LedgerEntry._fields):
+        old = (
+            await db.execute(
+                select(
+                    Transaction.date, Transaction.category_id, Transaction.type, Transaction.amount
+                )
+                .where(Transaction.id == transaction_id)
+                .with_for_update()
+            )
+        ).one_or_none()
+        if old is None:
+            raise NotFoundException("Transaction", transaction_id)
+
+    txn = await db.scalar(
+        update(Transaction)
+        .where(Transaction.id == transaction_id)
+        .values(**changes)
+        .returning(Transaction)
+    )
+    if txn is None:
+        raise NotFoundException("Transaction", transaction_id)
+    if old is not None:
+        await db.run_sync(
+            rollup_service.apply_changes,
+            [rollup_service.LedgerEntry(*old)],
+            [rollup_service.LedgerEntry.from_transaction(txn)],
+        )
+    analytics_cache.invalidate(db)
     return txn
 
 
 async def delete_transaction(db: AsyncSession, transaction_id: int) -> None:
-    txn = await get_transaction(db, transaction_id)
-    await db.delete(txn)
-    await db.flush()
+    entry = (
+        await db.execute(
+            delete(Transaction)
+            .where(Transaction.id == transaction_id)
+            .returning(
+                Transaction.date, Transaction.category_id, Transaction.type, Transaction.amount
+            )
+        )
+    ).one_or_none()
+    if entry is None:
+        raise NotFoundException("Transaction", transaction_id)
+    await db.run_sync(rollup_service.apply_changes, [rollup_service.LedgerEntry(*entry)])
+    analytics_cache.invalidate(db)
@@ -0,0 +1,158 @@
+import asyncio
+from collections.abc import Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.exceptions import ValidationException
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionCreate
+from app.services import transaction_service
+from app.services.category_cache import category_directory
+
+_Pending = tuple[TransactionCreate, asyncio.Future]
+
+
+class TransactionWriteBatcher:
+    """Group commit for single-transaction creates.
+
+    Requests queue their row and wait. A background task collects rows for
+    up to ``window`` seconds or ``max_rows`` rows, writes them in one
+    multi-row INSERT and commits once, then resolves each request with its
+    own row. A row with an unknown category fails alone; if the batch write
+    itself fails, its rows are retried one transaction each so a bad row
+    cannot take the others down. Anything else that goes wrong fails only
+    the batch at hand; if the task itself ends, queued requests fail instead
+    of waiting forever.
+    """
+
+    def __init__(self, window: float, max_rows: int):
+        self.window = window
+        self.max_rows = max_rows
+        self.batches = 0
+        self._session_factory: Callable[[], AsyncSession] | None = None
+        self._queue: asyncio.Queue[_Pending | None] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._batch: list[_Pending] = []
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, session_factory: Callable[[], AsyncSession]) -> None:
+        self._session_factory = session_factory
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop taking rows and wait until everything already queued is written."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        self._queue.put_nowait(None)
+        # A task that crashed or was cancelled has already failed its requests
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def submit(self, data: TransactionCreate) -> Transaction:
+        if not self.running:
+            raise RuntimeError("write batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((data, future))
+        return await future
+
+    async def _run(self) -> None:
+        try:
+            await self._loop()
+        finally:
+            error = RuntimeError("write batcher stopped")
+            for _, future in self._batch:
+                _resolve(future, error=error)
+            self._fail_queued(error)
+
+    async def _loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = self._batch = [item]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_rows:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), deadline - loop.time())
+                except TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                await self._write(batch)
+            except Exception as exc:
+                for _, future in batch:
+                    _resolve(future, error=exc)
+            self._batch = []
+
+    def _fail_queued(self, error: Exception) -> None:
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                _resolve(item[1], error=error)
+
+    async def _write(self, batch: list[_Pending]) -> None:
+        self.batches += 1
+        try:
+            async with self._session_factory() as db:
+                known = await category_directory.existing(
+                    db, (data.category_id for data, _ in batch)
+                )
+                pending = []
+                for data, future in batch:
+                    if data.category_id in known:
+                        pending.append((data, future))
+                    else:
+                        _resolve(
+                            future,
+                            error=ValidationException(
+                                f"category_id: Category with id {data.category_id} not found"
+                            ),
+                        )
+                created = await transaction_service.create_transactions(
+                    db, [data for data, _ in pending]
+                )
+                await db.commit()
+        except Exception:
+            await self._write_each([item for item in batch if not item[1].done()])
+            return
+        for (_, future), txn in zip(pending, created):
+            _resolve(future, result=txn)
+
+    async def _write_each(self, batch: list[_Pending]) -> None:
+        for data, future in batch:
+            try:
+                # Leaving the block rolls back whatever did not commit
+                async with self._session_factory() as db:
+                    txn = await transaction_service.create_transaction(db, data)
+                    await db.commit()
+            except Exception as exc:
+                _resolve(future, error=exc)
+            else:
+                _resolve(future, result=txn)
+
+
+def _resolve(
+    future: asyncio.Future, result: Transaction | None = None, error: Exception | None = None
+) -> None:
+    # The request may have gone away (client disconnect) while it waited
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+transaction_batcher = TransactionWriteBatcher(
+    settings.WRITE_BATCH_WINDOW_MS / 1000, settings.WRITE_BATCH_MAX_ROWS
+)
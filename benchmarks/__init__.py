@@ -0,0 +1 @@
+"""Reproducible performance benchmarks; see ``python -m benchmarks.run --help``."""
@@ -0,0 +1,407 @@
+"""Time every service function and route against a seeded SQLite database.
+
+Usage::
+
+    python -m benchmarks.run --rows 100000 --output results.json
+    python -m benchmarks.run --rows 100000 --baseline baseline.json
+
+Seeded databases are kept under ``--data-dir`` and reused across runs with
+the same size and seed. Results are written as JSON; with ``--baseline`` the
+run exits non-zero if any p50 or p95 regressed by more than ``--threshold``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+# The app builds its engine from settings at import time
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("DEBUG", "false")
+
+import sqlalchemy  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.database import get_db  # noqa: E402
+from app.main import create_app  # noqa: E402
+from app.models import Budget, Category, Transaction, TransactionType  # noqa: E402
+from app.schemas.budget import BudgetCreate, BudgetUpdate  # noqa: E402
+from app.schemas.transaction import TransactionCreate, TransactionUpdate  # noqa: E402
+from app.services import analytics_service, budget_service, transaction_service  # noqa: E402
+from app.services.analytics_cache import analytics_cache  # noqa: E402
+from benchmarks.seed import SEED_END, seed_database  # noqa: E402
+
+# A benchmark case performs one operation and returns how many rows it produced
+Case = Callable[[], Awaitable[int]]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted ``samples``."""
+    index = max(0, min(len(samples) - 1, round(pct / 100 * len(samples) + 0.5) - 1))
+    return samples[index]
+
+
+async def measure(case: Case, repeat: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await case()
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = await case()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    p50 = percentile(timings, 50)
+    return {
+        "iterations": repeat,
+        "rows": rows,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "p50_ms": p50 * 1000,
+        "p95_ms": percentile(timings, 95) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "rows_per_sec": rows / p50 if p50 > 0 else None,
+    }
+
+
+def build_cases(session_maker: async_sessionmaker, client: AsyncClient, ids: dict) -> dict[str, Case]:
+    """Every service function and route, each in a session that is rolled back."""
+
+    def service(call: Callable[[AsyncSession], Awaitable[int]]) -> Case:
+        async def run() -> int:
+            async with session_maker() as db:
+                try:
+                    return await call(db)
+                finally:
+                    await db.rollback()
+
+        return run
+
+    def route(method: str, url: str, count: Callable[[object], int] = lambda _: 1, **kwargs) -> Case:
+        async def run() -> int:
+            response = await client.request(method, url, **kwargs)
+            response.raise_for_status()
+            return count(response)
+
+        return run
+
+    async def list_rows(db, **kwargs):
+        items, _ = await transaction_service.list_transactions(db, **kwargs)
+        return len(items)
+
+    async def page_rows(db, **kwargs):
+        result = await transaction_service.list_transactions_page(db, **kwargs)
+        return len(result.items)
+
+    async def export_rows(db):
+        rows = 0
+        async for batch in transaction_service.iter_transaction_batches(db):
+            rows += len(batch)
+        return rows
+
+    async def create_one(db):
+        await transaction_service.create_transaction(db, new_transaction)
+        return 1
+
+    async def bulk_rows(db):
+        result = await transaction_service.bulk_create_transactions(db, bulk_payload)
+        return result.created
+
+    async def update_one(db):
+        await transaction_service.update_transaction(db, ids["transaction"], transaction_changes)
+        return 1
+
+    async def delete_one(db):
+        await transaction_service.delete_transaction(db, ids["transaction"])
+        return 1
+
+    async def create_budget(db):
+        await budget_service.create_budget(db, new_budget)
+        return 1
+
+    async def update_budget(db):
+        await budget_service.update_budget(db, ids["budget"], budget_changes)
+        return 1
+
+    async def delete_budget(db):
+        await budget_service.delete_budget(db, ids["budget"])
+        return 1
+
+    # Dates come from the seeded history, so results do not depend on the day of the run
+    new_transaction = TransactionCreate(
+        amount=Decimal("12.34"),
+        type=TransactionType.EXPENSE,
+        date=SEED_END,
+        category_id=ids["category"],
+    )
+    transaction_changes = TransactionUpdate(
+        amount=Decimal("56.78"), date=SEED_END.replace(day=1), category_id=ids["category"]
+    )
+    new_budget = BudgetCreate(
+        name="Benchmark",
+        amount=Decimal("500.00"),
+        start_date=SEED_END.replace(day=1),
+        end_date=SEED_END,
+        category_id=ids["category"],
+    )
+    budget_changes = BudgetUpdate(start_date=SEED_END.replace(month=1, day=1))
+    bulk_payload = [new_transaction.model_dump(mode="json")] * 1000
+    deep_page = max(1, ids["transactions"] // 20 // 2)
+    total = ids["transactions"]
+    year = SEED_END.year
+    series = f"start_date={year}-01-01&end_date={year + 1}-01-01"
+
+    return {
+        "service.list_transactions.page1": service(lambda db: list_rows(db)),
+        "service.list_transactions.deep_offset": service(lambda db: list_rows(db, page=deep_page)),
+        "service.list_transactions.no_total": service(lambda db: list_rows(db, include_total=False)),
+        "service.list_transactions.estimated_total": service(
+            lambda db: page_rows(db, count="estimated")
+        ),
+        "service.list_transactions.filtered": service(
+            lambda db: list_rows(db, category_id=ids["category"], type=TransactionType.EXPENSE)
+        ),
+        "service.get_transaction": service(
+            lambda db: _one(transaction_service.get_transaction(db, ids["transaction"]))
+        ),
+        "service.iter_transaction_batches": service(export_rows),
+        "service.create_transaction": service(create_one),
+        "service.bulk_create_transactions.1000": service(bulk_rows),
+        "service.update_transaction": service(update_one),
+        "service.delete_transaction": service(delete_one),
+        "service.get_balance": service(
+            lambda db: _rows(analytics_service.get_balance(db), total)
+        ),
+        "service.get_spending_by_category": service(
+            lambda db: _rows(analytics_service.get_spending_by_category(db), total)
+        ),
+        "service.get_monthly_summary": service(
+            lambda db: _rows(analytics_service.get_monthly_summary(db, year=year), total)
+        ),
+        "service.get_budget_status": service(
+            lambda db: _rows(analytics_service.get_budget_status(db), total)
+        ),
+        "service.get_trends": service(lambda db: _rows(analytics_service.get_trends(db), total)),
+        "service.get_time_series.day": service(
+            lambda db: _rows(
+                analytics_service.get_time_series(
+                    db, date(year, 1, 1), date(year + 1, 1, 1), granularity="day"
+                ),
+                total,
+            )
+        ),
+        "service.list_budgets": service(lambda db: _count(budget_service.list_budgets(db))),
+        "service.get_budget_detail": service(
+            lambda db: _one(budget_service.get_budget_detail(db, ids["budget"]))
+        ),
+        "service.list_transaction_budgets": service(
+            lambda db: _count(budget_service.list_transaction_budgets(db, ids["transaction"]))
+        ),
+        "service.create_budget": service(create_budget),
+        "service.update_budget": service(update_budget),
+        "service.delete_budget": service(delete_budget),
+        "route.GET /api/transactions/": route(
+            "GET", "/api/transactions/", lambda r: len(r.json()["items"])
+        ),
+        "route.GET /api/transactions/?deep": route(
+            "GET", f"/api/transactions/?page={deep_page}", lambda r: len(r.json()["items"])
+        ),
+        "route.GET /api/transactions/{id}": route("GET", f"/api/transactions/{ids['transaction']}"),
+        "route.GET /api/transactions/export": route(
+            "GET", "/api/transactions/export?format=ndjson", lambda r: r.text.count("\n")
+        ),
+        "route.POST /api/transactions/": route(
+            "POST", "/api/transactions/", json=new_transaction.model_dump(mode="json")
+        ),
+        "route.POST /api/transactions/bulk": route(
+            "POST", "/api/transactions/bulk", lambda r: r.json()["created"], json=bulk_payload
+        ),
+        "route.PUT /api/transactions/{id}": route(
+            "PUT",
+            f"/api/transactions/{ids['transaction']}",
+            json=transaction_changes.model_dump(mode="json", exclude_unset=True),
+        ),
+        "route.DELETE /api/transactions/{id}": route(
+            "DELETE", f"/api/transactions/{ids['transaction']}"
+        ),
+        "route.GET /api/transactions/{id}/budgets": route(
+            "GET", f"/api/transactions/{ids['transaction']}/budgets", lambda r: len(r.json())
+        ),
+        "route.GET /api/categories/": route("GET", "/api/categories/", lambda r: len(r.json())),
+        "route.GET /api/categories/{id}": route("GET", f"/api/categories/{ids['category']}"),
+        "route.POST /api/categories/": route(
+            "POST", "/api/categories/", json={"name": "Benchmark category"}
+        ),
+        "route.PUT /api/categories/{id}": route(
+            "PUT", f"/api/categories/{ids['category']}", json={"description": "Benchmark"}
+        ),
+        "route.DELETE /api/categories/{id}": route(
+            "DELETE", f"/api/categories/{ids['unused_category']}"
+        ),
+        "route.GET /api/budgets/": route("GET", "/api/budgets/", lambda r: len(r.json())),
+        "route.GET /api/budgets/{id}": route("GET", f"/api/budgets/{ids['budget']}"),
+        "route.POST /api/budgets/": route(
+            "POST", "/api/budgets/", json=new_budget.model_dump(mode="json")
+        ),
+        "route.PUT /api/budgets/{id}": route(
+            "PUT",
+            f"/api/budgets/{ids['budget']}",
+            json=budget_changes.model_dump(mode="json", exclude_unset=True),
+        ),
+        "route.DELETE /api/budgets/{id}": route("DELETE", f"/api/budgets/{ids['budget']}"),
+        "route.GET /api/analytics/balance": route("GET", "/api/analytics/balance", lambda r: total),
+        "route.GET /api/analytics/spending-by-category": route(
+            "GET", "/api/analytics/spending-by-category", lambda r: total
+        ),
+        "route.GET /api/analytics/monthly-summary": route(
+            "GET", f"/api/analytics/monthly-summary?year={year}", lambda r: total
+        ),
+        "route.GET /api/analytics/budget-status": route(
+            "GET", "/api/analytics/budget-status", lambda r: total
+        ),
+        "route.GET /api/analytics/trends": route("GET", "/api/analytics/trends", lambda r: total),
+        "route.GET /api/analytics/time-series": route(
+            "GET", f"/api/analytics/time-series?{series}&granularity=day", lambda r: total
+        ),
+        "route.GET /metrics": route("GET", "/metrics"),
+    }
+
+
+async def _one(awaitable: Awaitable) -> int:
+    await awaitable
+    return 1
+
+
+async def _count(awaitable: Awaitable) -> int:
+    return len(await awaitable)
+
+
+async def _rows(awaitable: Awaitable, rows: int) -> int:
+    await awaitable
+    return rows
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Describe every case whose p50 or p95 grew by more than ``threshold``."""
+    regressions = []
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(
+                    f"{name} {metric}: {previous[metric]:.3f} -> {current[metric]:.3f} ms"
+                )
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> dict:
+    data_dir = Path(args.data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    db_path = data_dir / f"bench_{args.rows}_{args.seed}.sqlite3"
+    url = f"sqlite+aiosqlite:///{db_path}"
+    if args.reseed or not db_path.exists():
+        print(f"Seeding {args.rows} transactions into {db_path} ...", file=sys.stderr)
+        await seed_database(url, args.rows, seed=args.seed)
+
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as db:
+        ids = {
+            "transactions": (await db.execute(select(func.count(Transaction.id)))).scalar_one(),
+            "transaction": (await db.execute(select(func.max(Transaction.id)))).scalar_one(),
+            "category": (await db.execute(select(func.min(Category.id)))).scalar_one(),
+            "budget": (await db.execute(select(func.max(Budget.id)))).scalar_one(),
+        }
+        # The category write cases delete a category no transaction uses
+        unused = Category(name="Benchmark (unused)")
+        ids["unused_category"] = await db.scalar(
+            select(Category.id).where(Category.name == unused.name)
+        )
+        if ids["unused_category"] is None:
+            db.add(unused)
+            await db.commit()
+            ids["unused_category"] = unused.id
+
+    # Measure the queries themselves, not the result cache
+    analytics_cache.max_size = 0
+
+    app = create_app()
+
+    async def rollback_db():
+        async with session_maker() as session:
+            try:
+                yield session
+            finally:
+                await session.rollback()
+
+    app.dependency_overrides[get_db] = rollback_db
+
+    results = {}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        cases = build_cases(session_maker, client, ids)
+        for name, case in cases.items():
+            if args.only and not any(part in name for part in args.only):
+                continue
+            results[name] = await measure(case, args.repeat, args.warmup)
+            print(f"{name:55} p50 {results[name]['p50_ms']:9.3f} ms", file=sys.stderr)
+
+    await engine.dispose()
+    return {
+        "meta": {
+            "rows": ids["transactions"],
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="transactions to seed")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the dataset")
+    parser.add_argument("--repeat", type=int, default=20, help="timed iterations per case")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed iterations per case")
+    parser.add_argument("--data-dir", default=".bench", help="where seeded databases live")
+    parser.add_argument("--reseed", action="store_true", help="rebuild the seeded database")
+    parser.add_argument("--only", nargs="*", help="run cases whose name contains any of these")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative slowdown before a case counts as regressed")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n")
+    else:
+        print(payload)
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Seed a SQLite database with a realistic, reproducible transaction history."""
+
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models import Base, Budget, Category, Transaction, TransactionType
+from app.services import rollup_service
+
+# (name, share of expense rows, median amount)
+EXPENSE_CATEGORIES = [
+    ("Groceries", 0.24, 45),
+    ("Dining", 0.16, 28),
+    ("Transport", 0.14, 18),
+    ("Shopping", 0.10, 60),
+    ("Utilities", 0.07, 90),
+    ("Rent", 0.03, 1400),
+    ("Entertainment", 0.08, 25),
+    ("Health", 0.05, 55),
+    ("Travel", 0.04, 320),
+    ("Subscriptions", 0.06, 12),
+    ("Education", 0.03, 150),
+]
+INCOME_CATEGORIES = [
+    ("Salary", 0.7, 3200),
+    ("Freelance", 0.3, 450),
+]
+INCOME_SHARE = 0.08
+HISTORY_DAYS = 3 * 365
+INSERT_CHUNK = 10_000
+# Last day of the seeded history: fixed, so a seed produces the same rows on any day
+SEED_END = date(2025, 12, 31)
+
+
+async def seed_database(url: str, rows: int, seed: int = 42, end: date = SEED_END) -> None:
+    """Create the schema at ``url`` and fill it with ``rows`` transactions.
+
+    Dates span three years ending at ``end`` (default ``SEED_END``), weighted
+    toward recent days; amounts are log-normal around a per-category median.
+    The same ``seed`` and ``end`` always produce the same data.
+    """
+    rng = random.Random(seed)
+    start = end - timedelta(days=HISTORY_DAYS)
+
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as db:
+        categories = {}
+        for name, _, median in EXPENSE_CATEGORIES + INCOME_CATEGORIES:
+            category = Category(name=name)
+            db.add(category)
+            categories[name] = (category, median)
+        await db.flush()
+
+        expense_ids = [categories[n][0].id for n, _, _ in EXPENSE_CATEGORIES]
+        expense_weights = [w for _, w, _ in EXPENSE_CATEGORIES]
+        income_ids = [categories[n][0].id for n, _, _ in INCOME_CATEGORIES]
+        income_weights = [w for _, w, _ in INCOME_CATEGORIES]
+        medians = {c.id: m for c, m in categories.values()}
+
+        remaining = rows
+        while remaining > 0:
+            batch = []
+            for _ in range(min(INSERT_CHUNK, remaining)):
+                is_income = rng.random() < INCOME_SHARE
+                category_id = rng.choices(
+                    income_ids if is_income else expense_ids,
+                    income_weights if is_income else expense_weights,
+                )[0]
+                amount = max(0.01, rng.lognormvariate(0, 0.6) * medians[category_id])
+                batch.append(
+                    {
+                        "amount": Decimal(f"{amount:.2f}"),
+                        "type": TransactionType.INCOME if is_income else TransactionType.EXPENSE,
+                        "description": None,
+                        "date": start + timedelta(days=int(rng.triangular(0, HISTORY_DAYS, HISTORY_DAYS))),
+                        "category_id": category_id,
+                    }
+                )
+            await db.execute(insert(Transaction.__table__), batch)
+            remaining -= len(batch)
+
+        # One overall and one per-category budget for each of the last 12 months
+        month = end.replace(day=1)
+        for _ in range(12):
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            db.add(
+                Budget(
+                    name=f"Overall {month:%Y-%m}",
+                    amount=Decimal("4000.00"),
+                    start_date=month,
+                    end_date=next_month - timedelta(days=1),
+                )
+            )
+            for category_id in expense_ids:
+                db.add(
+                    Budget(
+                        name=f"Category {category_id} {month:%Y-%m}",
+                        amount=Decimal(medians[category_id] * 20),
+                        start_date=month,
+                        end_date=next_month - timedelta(days=1),
+                        category_id=category_id,
+                    )
+                )
+            month = (month - timedelta(days=1)).replace(day=1)
+
+        await db.flush()
+        await rollup_service.rebuild_daily_totals(db)
+        await db.commit()
+
+    await engine.dispose()
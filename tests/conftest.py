@@ -8,6 +8,7 @@ from decimal import Decimal
 os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
 os.environ["APP_ENV"] = "test"
 os.environ["DEBUG"] = "false"
+os.environ["SQL_QUERY_HEADER"] = "true"
 
 import pytest
 import pytest_asyncio
@@ -30,6 +31,21 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def reset_analytics_cache():
+    """Each test gets its own database, so cached analytics must not leak."""
+    from app.services.analytics_cache import analytics_cache
+    from app.services.budget_index import budget_index
+    from app.services.category_cache import category_directory
+    from app.services.columnar_analytics import columnar_snapshot
+
+    analytics_cache.clear()
+    analytics_cache.bump()
+    category_directory.clear()
+    budget_index.clear()
+    columnar_snapshot.clear()
+
+
 @pytest_asyncio.fixture
 async def async_db():
     """Create a test database and return a session."""
@@ -113,3 +129,16 @@ async def sample_budget(async_db, sample_category):
     await async_db.flush()
     await async_db.refresh(budget)
     return budget
+
+
+@pytest_asyncio.fixture
+async def loaded_categories(async_db):
+    """Load the category directory as app startup does.
+
+    Request it after any category fixtures; the test client does not run the
+    lifespan.
+    """
+    from app.services.category_cache import category_directory
+
+    await category_directory.load(async_db)
+    return category_directory
@@ -1,11 +1,13 @@
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal
 
 import pytest
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from app.metrics import QUERY_COUNT_HEADER, assert_max_queries
 from app.models.transaction import Transaction, TransactionType
 from app.services import analytics_service
+from app.services.category_cache import category_directory
 
 
 class TestAnalyticsService:
@@ -50,6 +52,38 @@ class TestAnalyticsService:
         assert balance.total_expenses == Decimal("300.00")
         assert balance.net_balance == Decimal("700.00")
 
+    @pytest.mark.asyncio
+    async def test_sums_are_exact_cents(self, async_db: AsyncSession, sample_category):
+        """Test aggregates stay exact where float sums would drift (SQLite stores REAL)."""
+        async_db.add_all(
+            Transaction(
+                amount=Decimal(amount),
+                type=TransactionType.EXPENSE,
+                date=date(2024, 1, 1),
+                category_id=sample_category.id,
+            )
+            for amount in ["0.10"] * 10 + ["0.20", "10.10", "0.07"]
+        )
+        await async_db.flush()
+
+        balance = await analytics_service.get_balance(async_db)
+        assert str(balance.total_expenses) == "11.37"
+        assert str(balance.net_balance) == "-11.37"
+        spending = await analytics_service.get_spending_by_category(async_db)
+        assert spending.items[0].percentage == 100.0
+
+    def test_money_arithmetic(self):
+        """Test Money converts once and keeps cents exact."""
+        from app.money import ZERO, Money
+
+        total = sum((Money.of(a) for a in (Decimal("0.10"), 0.2, "10.10", 3)), ZERO)
+        assert total == Money(1340)
+        assert str(total.decimal) == "13.40"
+        assert str((ZERO - total).decimal) == "-13.40"
+        assert str(ZERO.decimal) == "0.00"
+        assert Money(1).percent_of(Money(3)) == 33.33
+        assert Money(5).percent_of(ZERO) == 0.0
+
     @pytest.mark.asyncio
     async def test_get_balance_with_date_range(
         self, async_db: AsyncSession, sample_category
@@ -168,6 +202,46 @@ class TestAnalyticsService:
         assert feb.income == Decimal("200.00")
         assert feb.expenses == Decimal("0")
 
+        # Months without transactions are zero-filled
+        assert [item.month for item in response.items] == list(range(1, 13))
+
+    @pytest.mark.asyncio
+    async def test_get_time_series(self, async_db: AsyncSession, sample_category):
+        """Test bucketing, zero-filled gaps and the exclusive end of the range."""
+        for amount, txn_type, day in [
+            ("10.00", TransactionType.EXPENSE, date(2024, 1, 2)),
+            ("5.00", TransactionType.EXPENSE, date(2024, 3, 31)),
+            ("100.00", TransactionType.INCOME, date(2024, 3, 1)),
+            ("99.00", TransactionType.EXPENSE, date(2024, 7, 1)),
+        ]:
+            async_db.add(
+                Transaction(
+                    amount=Decimal(amount), type=txn_type, date=day,
+                    category_id=sample_category.id,
+                )
+            )
+        await async_db.flush()
+
+        monthly = await analytics_service.get_time_series(
+            async_db, date(2024, 1, 1), date(2024, 7, 1), "month"
+        )
+        assert [p.period_start.month for p in monthly.items] == [1, 2, 3, 4, 5, 6]
+        assert monthly.items[1].expenses == Decimal("0")
+        assert monthly.items[2].net == Decimal("95.00")
+
+        quarterly = await analytics_service.get_time_series(
+            async_db, date(2024, 1, 1), date(2025, 1, 1), "quarter"
+        )
+        assert [p.expenses for p in quarterly.items] == [
+            Decimal("15.00"), Decimal("0"), Decimal("99.00"), Decimal("0")
+        ]
+
+        weekly = await analytics_service.get_time_series(
+            async_db, date(2024, 1, 1), date(2024, 1, 15), "week"
+        )
+        assert [p.period_start for p in weekly.items] == [date(2024, 1, 1), date(2024, 1, 8)]
+        assert weekly.items[0].expenses == Decimal("10.00")
+
     @pytest.mark.asyncio
     async def test_get_budget_status(self, async_db: AsyncSession):
         """Test getting budget status for active budgets."""
@@ -209,6 +283,59 @@ class TestAnalyticsService:
         assert item.remaining == Decimal("350.00")
         assert item.percentage_used == 30.0
 
+    @pytest.mark.asyncio
+    async def test_get_budget_status_multiple_budgets(self, async_db: AsyncSession):
+        """Test budget status totals for overlapping global and scoped budgets."""
+        from app.models.budget import Budget
+        from app.models.category import Category
+        from app.services import budget_service
+
+        food = Category(name="StatusFood")
+        travel = Category(name="StatusTravel")
+        async_db.add_all([food, travel])
+        await async_db.flush()
+
+        today = date.today()
+        start = today.replace(day=1)
+        end = today + timedelta(days=30)
+        overall = Budget(name="Overall", amount=Decimal("1000.00"), start_date=start, end_date=end)
+        food_budget = Budget(
+            name="Food", amount=Decimal("200.00"), start_date=start, end_date=end,
+            category_id=food.id,
+        )
+        empty_budget = Budget(
+            name="Travel", amount=Decimal("300.00"), start_date=start, end_date=end,
+            category_id=travel.id,
+        )
+        async_db.add_all([overall, food_budget, empty_budget])
+        await async_db.flush()
+
+        for amount, category, txn_type in [
+            ("40.00", food, TransactionType.EXPENSE),
+            ("10.00", food, TransactionType.EXPENSE),
+            ("500.00", food, TransactionType.INCOME),
+        ]:
+            async_db.add(
+                Transaction(
+                    amount=Decimal(amount), type=txn_type, date=start, category_id=category.id
+                )
+            )
+        await async_db.flush()
+
+        await category_directory.load(async_db)
+        with assert_max_queries(1):
+            response = await analytics_service.get_budget_status(async_db)
+        by_id = {item.budget_id: item for item in response.items}
+
+        assert len(response.items) == 3
+        assert by_id[overall.id].category_name is None
+        assert by_id[food_budget.id].category_name == "StatusFood"
+        assert by_id[empty_budget.id].spent == Decimal("0")
+        for budget in (overall, food_budget, empty_budget):
+            expected = Decimal(str(await budget_service._compute_spent(async_db, budget)))
+            assert by_id[budget.id].spent == expected
+        assert by_id[overall.id].spent == Decimal("50.00")
+
     @pytest.mark.asyncio
     async def test_get_trends(self, async_db: AsyncSession, sample_category):
         """Test getting spending trends."""
@@ -231,6 +358,273 @@ class TestAnalyticsService:
         assert response.current_period_spending == Decimal("100.00")
         # previous_period_spending could be 0 if no transactions in previous month
 
+    @pytest.mark.asyncio
+    async def test_get_trends_multiple_periods(self, async_db: AsyncSession, sample_category):
+        """Test N consecutive monthly totals with period-over-period deltas."""
+        current_start = date.today().replace(day=1)
+        two_months_ago = (current_start - timedelta(days=32)).replace(day=1)
+        for amount, day in [("40.00", two_months_ago), ("60.00", current_start)]:
+            async_db.add(
+                Transaction(
+                    amount=Decimal(amount), type=TransactionType.EXPENSE, date=day,
+                    category_id=sample_category.id,
+                )
+            )
+        await async_db.flush()
+
+        response = await analytics_service.get_trends(async_db, period="monthly", periods=4)
+
+        assert len(response.items) == 4
+        assert response.items[-1].period_start == current_start
+        assert [i.spending for i in response.items[1:]] == [
+            Decimal("40.00"), Decimal("0"), Decimal("60.00")
+        ]
+        assert response.items[0].change_amount is None
+        assert response.items[2].change_amount == Decimal("-40.00")
+        assert response.items[2].change_percentage == -100.0
+        assert response.items[3].change_percentage is None
+        assert response.current_period_spending == Decimal("60.00")
+        assert response.change_amount == Decimal("60.00")
+
+
+class TestDailyRollup:
+    """Test the incrementally maintained daily_totals rollup."""
+
+    @staticmethod
+    async def _snapshot(db: AsyncSession) -> dict:
+        from sqlalchemy import select
+
+        from app.models.daily_total import DailyTotal
+
+        rows = (await db.execute(select(DailyTotal))).scalars().all()
+        return {
+            (r.date, r.category_id, r.type): (Decimal(str(r.total)), r.count)
+            for r in rows
+            if r.count
+        }
+
+    @pytest.mark.asyncio
+    async def test_writes_match_rebuild(self, async_db: AsyncSession, sample_category):
+        """Test create, update, delete and bulk writes keep the rollup exact."""
+        from app.schemas.transaction import TransactionCreate, TransactionUpdate
+        from app.services import rollup_service, transaction_service
+
+        first = await transaction_service.create_transaction(
+            async_db,
+            TransactionCreate(
+                amount=Decimal("40.00"), type=TransactionType.EXPENSE,
+                date=date(2024, 3, 1), category_id=sample_category.id,
+            ),
+        )
+        second = await transaction_service.create_transaction(
+            async_db,
+            TransactionCreate(
+                amount=Decimal("15.00"), type=TransactionType.EXPENSE,
+                date=date(2024, 3, 1), category_id=sample_category.id,
+            ),
+        )
+        await transaction_service.bulk_create_transactions(
+            async_db,
+            [{"amount": "7.00", "type": "income", "date": "2024-03-02",
+              "category_id": sample_category.id}] * 3,
+        )
+        await transaction_service.update_transaction(
+            async_db,
+            first.id,
+            TransactionUpdate(amount=Decimal("30.00"), date=date(2024, 3, 5)),
+        )
+        # Old and new contribution share a rollup key
+        await transaction_service.update_transaction(
+            async_db, first.id, TransactionUpdate(amount=Decimal("45.00"))
+        )
+        await transaction_service.delete_transaction(async_db, second.id)
+
+        maintained = await self._snapshot(async_db)
+        await rollup_service.rebuild_daily_totals(async_db)
+        rebuilt = await self._snapshot(async_db)
+
+        assert maintained == rebuilt
+        assert maintained[(date(2024, 3, 5), sample_category.id, TransactionType.EXPENSE)] == (
+            Decimal("45.00"), 1
+        )
+        assert (date(2024, 3, 1), sample_category.id, TransactionType.EXPENSE) not in maintained
+
+        balance = await analytics_service.get_balance(async_db)
+        assert balance.total_income == Decimal("21.00")
+        assert balance.total_expenses == Decimal("45.00")
+
+
+class TestColumnarSnapshot:
+    """Test the numpy analytics engine against the SQL path."""
+
+    @staticmethod
+    async def _results(db: AsyncSession, columnar: bool) -> list[str]:
+        from app.services.analytics_cache import analytics_cache
+        from app.services.columnar_analytics import columnar_snapshot
+
+        enabled, columnar_snapshot.enabled = columnar_snapshot.enabled, columnar
+        analytics_cache.clear()
+        results = [
+            await analytics_service.get_balance(db),
+            await analytics_service.get_balance(db, date(2024, 3, 2), date(2024, 3, 31)),
+            await analytics_service.get_spending_by_category(db),
+            await analytics_service.get_spending_by_category(db, end_date=date(2024, 3, 1)),
+            await analytics_service.get_monthly_summary(db, 2024),
+            await analytics_service.get_time_series(
+                db, date(2024, 2, 26), date(2024, 3, 18), "week"
+            ),
+            await analytics_service.get_trends(db, "weekly", 3),
+        ]
+        columnar_snapshot.enabled = enabled
+        return [result.model_dump_json() for result in results]
+
+    @pytest.mark.asyncio
+    async def test_matches_sql_across_writes(
+        self, async_db: AsyncSession, sample_category, monkeypatch
+    ):
+        """Test results match the SQL path exactly, before and after writes."""
+        pytest.importorskip("numpy")
+        from app.models.category import Category
+        from app.schemas.transaction import TransactionCreate, TransactionUpdate
+        from app.services import transaction_service
+        from app.services.columnar_analytics import columnar_snapshot
+
+        monkeypatch.setattr(columnar_snapshot, "enabled", True)
+        monkeypatch.setattr(
+            columnar_snapshot, "session_factory", async_sessionmaker(async_db.bind)
+        )
+        # Fold deltas into the sorted base after the second commit
+        monkeypatch.setattr(columnar_snapshot, "MERGE_THRESHOLD", 2)
+
+        other = Category(name="Travel")
+        async_db.add(other)
+        await async_db.flush()
+        today = date.today()
+        await transaction_service.bulk_create_transactions(
+            async_db,
+            [
+                {"amount": "40.10", "type": "expense", "date": "2024-03-01",
+                 "category_id": sample_category.id},
+                {"amount": "12.34", "type": "expense", "date": "2024-03-04",
+                 "category_id": other.id},
+                {"amount": "0.01", "type": "expense", "date": "2024-03-09",
+                 "category_id": other.id},
+                {"amount": "1000.00", "type": "income", "date": "2024-03-04",
+                 "category_id": sample_category.id},
+                {"amount": "19.99", "type": "expense", "date": today.isoformat(),
+                 "category_id": other.id},
+            ],
+        )
+        await async_db.commit()
+        assert await self._results(async_db, True) == await self._results(async_db, False)
+        loads = columnar_snapshot.loads
+
+        # Committed creates and deletes arrive as deltas, without a reload
+        txn = await transaction_service.create_transaction(
+            async_db,
+            TransactionCreate(amount=Decimal("52.25"), type=TransactionType.EXPENSE,
+                              date=date(2024, 3, 5), category_id=sample_category.id),
+        )
+        await async_db.commit()
+        assert await self._results(async_db, True) == await self._results(async_db, False)
+        await transaction_service.delete_transaction(async_db, txn.id)
+        await async_db.commit()
+        assert await self._results(async_db, True) == await self._results(async_db, False)
+
+        # Updates arrive as a -old/+new pair
+        await transaction_service.update_transaction(
+            async_db, 1, TransactionUpdate(category_id=other.id, amount=Decimal("3.00"))
+        )
+        await async_db.commit()
+        assert await self._results(async_db, True) == await self._results(async_db, False)
+        assert columnar_snapshot.loads == loads
+
+    @pytest.mark.asyncio
+    async def test_load_ignores_callers_uncommitted_writes(self, tmp_path, monkeypatch):
+        """Test a load during a write does not count that write's staged rows twice."""
+        pytest.importorskip("numpy")
+        from app.models.base import Base
+        from app.models.category import Category
+        from app.schemas.transaction import TransactionCreate
+        from app.services import transaction_service
+        from app.services.columnar_analytics import columnar_snapshot
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        monkeypatch.setattr(columnar_snapshot, "enabled", True)
+        monkeypatch.setattr(columnar_snapshot, "session_factory", sessions)
+
+        async with sessions() as db:
+            category = Category(name="Salary")
+            db.add(category)
+            await db.flush()
+            await transaction_service.create_transaction(
+                db,
+                TransactionCreate(amount=Decimal("100.00"), type=TransactionType.INCOME,
+                                  date=date(2024, 3, 1), category_id=category.id),
+            )
+            # Loads while the write is staged but not committed
+            await columnar_snapshot.load()
+            await db.commit()
+
+        async with sessions() as db:
+            assert await self._results(db, True) == await self._results(db, False)
+        await engine.dispose()
+
+
+class TestAnalyticsCache:
+    """Test the analytics result cache and its write-driven invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_and_invalidation(self, async_db: AsyncSession, sample_category):
+        """Test repeated calls hit the cache until a service write bumps the version."""
+        from app.schemas.transaction import TransactionCreate
+        from app.services import transaction_service
+        from app.services.analytics_cache import analytics_cache
+
+        first = await analytics_service.get_balance(async_db)
+        second = await analytics_service.get_balance(async_db, start_date=None)
+        assert second is first
+        assert analytics_cache.hits == 1
+
+        await transaction_service.create_transaction(
+            async_db,
+            TransactionCreate(
+                amount=Decimal("25.00"), type=TransactionType.INCOME,
+                date=date(2024, 1, 1), category_id=sample_category.id,
+            ),
+        )
+
+        third = await analytics_service.get_balance(async_db)
+        assert third.total_income == Decimal("25.00")
+        assert analytics_cache.misses == 2
+
+    @pytest.mark.asyncio
+    async def test_today_dependent_results_roll_over(
+        self, async_db: AsyncSession, monkeypatch
+    ):
+        """Test date-relative results are keyed on the current date."""
+        import app.services.analytics_cache as cache_module
+
+        class FakeDate(date):
+            current = date(2024, 5, 1)
+
+            @classmethod
+            def today(cls):
+                return cls.current
+
+        monkeypatch.setattr(cache_module, "date", FakeDate)
+
+        await analytics_service.get_budget_status(async_db)
+        await analytics_service.get_budget_status(async_db)
+        FakeDate.current = date(2024, 5, 2)
+        await analytics_service.get_budget_status(async_db)
+
+        assert cache_module.analytics_cache.hits == 1
+        assert cache_module.analytics_cache.misses == 2
+
 
 class TestAnalyticsEndpoints:
     """Test analytics API endpoints."""
@@ -283,11 +677,64 @@ class TestAnalyticsEndpoints:
         assert data["year"] == 2024
 
     @pytest.mark.asyncio
-    async def test_get_budget_status_endpoint(self, client):
+    async def test_get_time_series_endpoint(self, client):
+        """Test GET /api/analytics/time-series"""
+        response = await client.get(
+            "/api/analytics/time-series",
+            params={"start_date": "2024-01-01", "end_date": "2024-01-08", "granularity": "day"},
+        )
+
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == 7
+
+        response = await client.get(
+            "/api/analytics/time-series",
+            params={"start_date": "2024-02-01", "end_date": "2024-01-01"},
+        )
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_analytics_ranges_are_bounded(self, client):
+        """Test oversized or overflowing ranges are rejected with 422, not 500."""
+        for year in (0, 9999):
+            response = await client.get("/api/analytics/monthly-summary", params={"year": year})
+            assert response.status_code == 422
+        response = await client.get("/api/analytics/monthly-summary", params={"year": 9998})
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == 12
+
+        for params in (
+            {"start_date": "1900-01-01", "end_date": "2100-01-01", "granularity": "day"},
+            {"start_date": "9999-01-01", "end_date": "9999-12-31", "granularity": "month"},
+            {"start_date": "9999-12-01", "end_date": "9999-12-31", "granularity": "week"},
+        ):
+            response = await client.get("/api/analytics/time-series", params=params)
+            assert response.status_code == 422, params
+
+    @pytest.mark.asyncio
+    async def test_analytics_conditional_get(self, client, async_db, sample_category):
+        """Test analytics ETags follow writes to the tables they read."""
+        response = await client.get("/api/analytics/spending-by-category")
+        etag = response.headers["etag"]
+        headers = {"If-None-Match": etag}
+
+        response = await client.get("/api/analytics/spending-by-category", headers=headers)
+        assert response.status_code == 304
+
+        await client.put(f"/api/categories/{sample_category.id}", json={"name": "Renamed"})
+        # The test session stands in for get_db, which commits after the response
+        await async_db.commit()
+        response = await client.get("/api/analytics/spending-by-category", headers=headers)
+        assert response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_get_budget_status_endpoint(self, client, loaded_categories):
         """Test GET /api/analytics/budget-status"""
         response = await client.get("/api/analytics/budget-status")
 
         assert response.status_code == 200
+        # One query for the data, one for the ETag counters
+        assert int(response.headers[QUERY_COUNT_HEADER]) <= 2
         data = response.json()
         assert "items" in data
 
@@ -311,9 +758,32 @@ class TestAnalyticsEndpoints:
         data = response.json()
         assert "current_period_spending" in data
 
+    @pytest.mark.asyncio
+    async def test_get_trends_many_periods_endpoint(self, client):
+        """Test GET /api/analytics/trends with periods=N."""
+        response = await client.get("/api/analytics/trends?period=weekly&periods=12")
+
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert len(items) == 12
+        assert items[-1]["period_end"] == date.today().isoformat()
+
     @pytest.mark.asyncio
     async def test_get_trends_invalid_period_endpoint(self, client):
         """Test GET /api/analytics/trends with invalid period."""
         response = await client.get("/api/analytics/trends?period=invalid")
 
-        assert response.status_code == 422  # Validation error
\ No newline at end of file
+        assert response.status_code == 422  # Validation error
+
+    @pytest.mark.asyncio
+    async def test_get_cache_stats_endpoint(self, client):
+        """Test GET /api/analytics/cache-stats"""
+        await client.get("/api/analytics/balance")
+        await client.get("/api/analytics/balance")
+
+        response = await client.get("/api/analytics/cache-stats")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["hits"] == 1
+        assert data["misses"] == 1
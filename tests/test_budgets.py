@@ -2,10 +2,13 @@ from datetime import date
 from decimal import Decimal
 
 import pytest
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.exceptions import NotFoundException
+from app.exceptions import NotFoundException, ValidationException
+from app.metrics import QUERY_COUNT_HEADER
 from app.models.budget import Budget
+from app.models.category import Category
 from app.models.transaction import Transaction, TransactionType
 from app.services import budget_service
 
@@ -122,6 +125,189 @@ class TestBudgetService:
         with pytest.raises(ValueError, match="end_date must be after start_date"):
             await budget_service.update_budget(async_db, sample_budget.id, update_data)
 
+    @pytest.mark.asyncio
+    async def test_update_budget_one_date_checked_against_stored(
+        self, async_db: AsyncSession, sample_budget
+    ):
+        """Test a single changed date is validated against the stored other date."""
+        from app.schemas.budget import BudgetUpdate
+
+        with pytest.raises(ValidationException):
+            await budget_service.update_budget(
+                async_db, sample_budget.id, BudgetUpdate(end_date=date(2023, 12, 31))
+            )
+        with pytest.raises(NotFoundException):
+            await budget_service.update_budget(
+                async_db, 9999, BudgetUpdate(end_date=date(2023, 12, 31))
+            )
+
+        updated = await budget_service.update_budget(
+            async_db, sample_budget.id, BudgetUpdate(start_date=date(2024, 1, 15))
+        )
+        assert updated.start_date == date(2024, 1, 15)
+        assert updated.end_date == date(2024, 1, 31)
+
+    @pytest.mark.asyncio
+    async def test_spent_counter_follows_writes(
+        self, async_db: AsyncSession, sample_budget, sample_category
+    ):
+        """Test budgets.spent stays equal to a fresh sum across every write path."""
+        from sqlalchemy import update
+
+        from app.schemas.budget import BudgetUpdate
+        from app.schemas.transaction import TransactionCreate, TransactionUpdate
+        from app.services import rollup_service, transaction_service
+
+        other = Category(name="Other")
+        overall = Budget(
+            name="Overall", amount=Decimal("900.00"),
+            start_date=date(2024, 1, 1), end_date=date(2024, 2, 29),
+        )
+        async_db.add_all([other, overall])
+        await async_db.flush()
+        budgets = [sample_budget, overall]
+
+        async def assert_consistent():
+            for budget in budgets:
+                stored = (await budget_service.get_budget_detail(async_db, budget.id)).spent
+                assert stored == await budget_service._compute_spent(async_db, budget)
+
+        txn = await transaction_service.create_transaction(
+            async_db,
+            TransactionCreate(amount=Decimal("40.00"), type=TransactionType.EXPENSE,
+                              date=date(2024, 1, 10), category_id=sample_category.id),
+        )
+        await transaction_service.bulk_create_transactions(
+            async_db,
+            [{"amount": "5.00", "type": "expense", "date": "2024-01-20",
+              "category_id": other.id}] * 2,
+        )
+        await assert_consistent()
+        assert (await budget_service.get_budget_detail(async_db, overall.id)).spent == Decimal("50.00")
+
+        for changes in (
+            TransactionUpdate(amount=Decimal("45.00")),
+            TransactionUpdate(category_id=other.id),
+            TransactionUpdate(date=date(2024, 2, 10)),
+            TransactionUpdate(type=TransactionType.INCOME),
+            TransactionUpdate(type=TransactionType.EXPENSE, date=date(2024, 1, 5),
+                              category_id=sample_category.id),
+        ):
+            await transaction_service.update_transaction(async_db, txn.id, changes)
+            await assert_consistent()
+
+        await budget_service.update_budget(
+            async_db, sample_budget.id, BudgetUpdate(start_date=date(2024, 1, 6))
+        )
+        await budget_service.update_budget(
+            async_db, overall.id, BudgetUpdate(category_id=other.id)
+        )
+        await assert_consistent()
+
+        await transaction_service.delete_transaction(async_db, txn.id)
+        await assert_consistent()
+
+        # Repair drift introduced behind the application's back
+        await async_db.execute(
+            update(Budget).where(Budget.id == overall.id).values(spent=Decimal("1.00"))
+        )
+        assert await rollup_service.rebuild_budget_spent(async_db) == 1
+        await assert_consistent()
+
+    @pytest.mark.asyncio
+    async def test_global_budget_spent_survives_rescoping_and_rebuild(
+        self, async_db: AsyncSession, sample_transaction
+    ):
+        """Test a global budget keeps every category's expenses in spent."""
+        from app.schemas.budget import BudgetUpdate
+        from app.services import rollup_service
+
+        overall = Budget(
+            name="Overall", amount=Decimal("900.00"),
+            start_date=date(2024, 1, 1), end_date=date(2024, 1, 20),
+        )
+        async_db.add(overall)
+        await async_db.flush()
+
+        await budget_service.update_budget(
+            async_db, overall.id, BudgetUpdate(end_date=date(2024, 1, 31))
+        )
+        detail = await budget_service.get_budget_detail(async_db, overall.id)
+        assert detail.spent == Decimal("50.00")
+
+        # Nothing has drifted, so the repair must not touch the global budget
+        assert await rollup_service.rebuild_budget_spent(async_db) == 0
+        detail = await budget_service.get_budget_detail(async_db, overall.id)
+        assert detail.spent == Decimal("50.00")
+
+    @pytest.mark.asyncio
+    async def test_budget_index_follows_writes(
+        self, async_db: AsyncSession, sample_budget, sample_category
+    ):
+        """Test the interval index answers coverage and overlap queries after writes."""
+        from app.schemas.budget import BudgetCreate, BudgetUpdate
+        from app.services.budget_index import budget_index
+
+        overall = await budget_service.create_budget(
+            async_db,
+            BudgetCreate(name="Overall", amount=Decimal("900.00"),
+                         start_date=date(2024, 1, 20), end_date=date(2024, 3, 1)),
+        )
+        covering = budget_index.covering
+        assert await covering(async_db, date(2024, 1, 25), sample_category.id) == sorted(
+            [sample_budget.id, overall.id]
+        )
+        assert await covering(async_db, date(2024, 2, 15), sample_category.id) == [overall.id]
+        assert await covering(async_db, date(2023, 12, 31), sample_category.id) == []
+        assert await budget_index.overlapping(
+            async_db, date(2024, 2, 1), date(2024, 2, 5)
+        ) == [overall.id]
+        loads = budget_index.loads
+        await covering(async_db, date(2024, 1, 25), sample_category.id)
+        assert budget_index.loads == loads
+
+        await budget_service.update_budget(
+            async_db, sample_budget.id, BudgetUpdate(end_date=date(2024, 1, 10))
+        )
+        assert await covering(async_db, date(2024, 1, 25), sample_category.id) == [overall.id]
+        await budget_service.delete_budget(async_db, overall.id)
+        assert await covering(async_db, date(2024, 1, 25), sample_category.id) == []
+
+    @pytest.mark.asyncio
+    async def test_transaction_budgets_see_other_workers_budgets(
+        self, async_db: AsyncSession, sample_budget, sample_transaction
+    ):
+        """Test a budget committed without this process's invalidation is listed."""
+        listed = budget_service.list_transaction_budgets
+        assert len(await listed(async_db, sample_transaction.id)) == 1
+
+        # Written like another worker would: nothing drops this process's index
+        async_db.add(
+            Budget(name="Overall", amount=Decimal("900.00"),
+                   start_date=date(2024, 1, 1), end_date=date(2024, 2, 1))
+        )
+        await async_db.commit()
+
+        assert len(await listed(async_db, sample_transaction.id)) == 2
+
+    @pytest.mark.asyncio
+    async def test_transaction_budgets_recheck_stale_index(
+        self, async_db: AsyncSession, sample_budget, sample_transaction
+    ):
+        """Test a budget moved to another category by another worker is not listed."""
+        other = Category(name="Travel")
+        async_db.add(other)
+        await async_db.flush()
+        listed = budget_service.list_transaction_budgets
+        assert len(await listed(async_db, sample_transaction.id)) == 1
+
+        # Bypasses the service, so the in-process index still has the old scope
+        await async_db.execute(
+            update(Budget).where(Budget.id == sample_budget.id).values(category_id=other.id)
+        )
+
+        assert await listed(async_db, sample_transaction.id) == []
+
     @pytest.mark.asyncio
     async def test_delete_budget(self, async_db: AsyncSession, sample_budget):
         """Test deleting a budget."""
@@ -137,7 +323,7 @@ class TestBudgetEndpoints:
     """Test budget API endpoints."""
 
     @pytest.mark.asyncio
-    async def test_create_budget_endpoint(self, client, sample_category):
+    async def test_create_budget_endpoint(self, client, sample_category, loaded_categories):
         """Test POST /api/budgets/"""
         response = await client.post(
             "/api/budgets/",
@@ -151,6 +337,7 @@ class TestBudgetEndpoints:
         )
 
         assert response.status_code == 201
+        assert int(response.headers[QUERY_COUNT_HEADER]) <= 1
         data = response.json()
         assert data["name"] == "February Budget"
         assert data["amount"] == "800.00"
@@ -194,6 +381,8 @@ class TestBudgetEndpoints:
         response = await client.get("/api/budgets/")
 
         assert response.status_code == 200
+        # One query for the data, one for the ETag counters
+        assert int(response.headers[QUERY_COUNT_HEADER]) <= 2
         data = response.json()
         assert isinstance(data, list)
         assert len(data) > 0
@@ -230,10 +419,41 @@ class TestBudgetEndpoints:
         )
 
         assert response.status_code == 200
+        assert int(response.headers[QUERY_COUNT_HEADER]) <= 1
         data = response.json()
         assert data["name"] == "Updated Budget Name"
+
+        response = await client.put(
+            f"/api/budgets/{sample_budget.id}", json={"start_date": "2024-02-01"}
+        )
+        assert response.status_code == 422
         assert data["amount"] == "1200.00"
 
+    @pytest.mark.asyncio
+    async def test_transaction_budgets_endpoint(
+        self, client, async_db: AsyncSession, sample_budget, sample_transaction
+    ):
+        """Test GET /api/transactions/{transaction_id}/budgets"""
+        async_db.add(
+            Budget(name="Next Month", amount=Decimal("100.00"),
+                   start_date=date(2024, 2, 1), end_date=date(2024, 2, 29))
+        )
+        await async_db.flush()
+
+        response = await client.get(f"/api/transactions/{sample_transaction.id}/budgets")
+        assert response.status_code == 200
+        data = response.json()
+        assert [budget["id"] for budget in data] == [sample_budget.id]
+        assert data[0]["spent"] == "50.00"
+        assert data[0]["remaining"] == "450.00"
+
+        await client.put(f"/api/transactions/{sample_transaction.id}", json={"type": "income"})
+        response = await client.get(f"/api/transactions/{sample_transaction.id}/budgets")
+        assert response.json() == []
+
+        response = await client.get("/api/transactions/99999/budgets")
+        assert response.status_code == 404
+
     @pytest.mark.asyncio
     async def test_delete_budget_endpoint(self, client, sample_budget):
         """Test DELETE /api/budgets/{budget_id}"""
@@ -5,6 +5,7 @@ import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.exceptions import ConflictException, NotFoundException
+from app.metrics import QUERY_COUNT_HEADER
 from app.models.category import Category
 from app.models.transaction import Transaction, TransactionType
 
@@ -24,6 +25,7 @@ class TestCategoryEndpoints:
         )
 
         assert response.status_code == 201
+        assert int(response.headers[QUERY_COUNT_HEADER]) <= 1
         data = response.json()
         assert data["name"] == "Travel"
         assert data["description"] == "Travel and transportation expenses"
@@ -63,6 +65,8 @@ class TestCategoryEndpoints:
         response = await client.get("/api/categories/")
 
         assert response.status_code == 200
+        # One query for the data, one for the ETag counters
+        assert int(response.headers[QUERY_COUNT_HEADER]) <= 2
         data = response.json()
         assert isinstance(data, list)
         assert len(data) > 0
@@ -105,6 +109,24 @@ class TestCategoryEndpoints:
         assert data["name"] == "Updated Category"
         assert data["description"] == "Updated description"
 
+    @pytest.mark.asyncio
+    async def test_category_directory_follows_writes(
+        self, client, sample_category, sample_transaction, loaded_categories
+    ):
+        """Test analytics resolve names from the directory, refreshed by category writes."""
+        await client.put(f"/api/categories/{sample_category.id}", json={"name": "Groceries"})
+
+        response = await client.get("/api/analytics/spending-by-category")
+        assert response.json()["items"][0]["category_name"] == "Groceries"
+
+        response = await client.post("/api/categories/", json={"name": "Travel"})
+        response = await client.post(
+            "/api/transactions/",
+            json={"amount": "5.00", "type": "expense", "date": "2024-01-20",
+                  "category_id": response.json()["id"]},
+        )
+        assert response.status_code == 201
+
     @pytest.mark.asyncio
     async def test_update_category_partial(self, client, sample_category):
         """Test partial update of category."""
@@ -146,6 +168,37 @@ class TestCategoryEndpoints:
 
         assert response.status_code == 404
 
+    @pytest.mark.asyncio
+    async def test_delete_category_detaches_budgets(self, client, async_db, sample_budget):
+        """Test budgets scoped to a deleted category become global, spent included."""
+        other = Category(name="Travel")
+        async_db.add(other)
+        await async_db.flush()
+        async_db.add(
+            Transaction(amount=Decimal("40.00"), type=TransactionType.EXPENSE,
+                        date=date(2024, 1, 10), category_id=other.id)
+        )
+        await async_db.flush()
+
+        response = await client.delete(f"/api/categories/{sample_budget.category_id}")
+
+        assert response.status_code == 204
+        data = (await client.get(f"/api/budgets/{sample_budget.id}")).json()
+        assert data["category_id"] is None
+        assert data["spent"] == "40.00"
+
+    @pytest.mark.asyncio
+    async def test_delete_category_in_use_keeps_budgets(
+        self, client, sample_budget, sample_transaction
+    ):
+        """Test a refused delete leaves the category's budgets scoped to it."""
+        response = await client.delete(f"/api/categories/{sample_budget.category_id}")
+
+        assert response.status_code == 409
+        data = (await client.get(f"/api/budgets/{sample_budget.id}")).json()
+        assert data["category_id"] == sample_budget.category_id
+        assert data["spent"] == "50.00"
+
     @pytest.mark.asyncio
     async def test_delete_category_with_transactions(
         self, client, async_db, sample_category, sample_transaction
@@ -0,0 +1,231 @@
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.requests import Request
+
+from app import database
+from app.config import Settings
+from app.database import InstrumentedQueuePool, ReplicaRouting, engine_options, pool_stats
+from app.metrics import QueryBudgetExceeded, assert_max_queries, track_queries
+from app.models import Base
+
+
+class TestEngineConfiguration:
+    """Test settings profiles and engine/pool options."""
+
+    def test_production_profile_defaults(self):
+        """Test APP_ENV=production turns echo off and sizes the pool."""
+        config = Settings(APP_ENV="production", _env_file=None)
+
+        assert config.DEBUG is False
+        assert config.SQL_ECHO is False
+        assert config.DB_POOL_SIZE == 20
+        assert config.DB_POOL_PRE_PING is True
+        assert config.DB_STATEMENT_TIMEOUT_MS == 30_000
+
+    def test_production_profile_keeps_explicit_values(self):
+        """Test explicitly configured values win over the profile."""
+        config = Settings(APP_ENV="production", DB_POOL_SIZE=7, _env_file=None)
+
+        assert config.DB_POOL_SIZE == 7
+
+    def test_asyncpg_engine_options(self):
+        """Test pool sizing and asyncpg driver settings for a Postgres URL."""
+        config = Settings(
+            APP_ENV="production",
+            DATABASE_URL="postgresql+asyncpg://u:p@db/app",
+            _env_file=None,
+        )
+
+        options = engine_options(config)
+
+        assert options["echo"] is False
+        assert options["poolclass"] is InstrumentedQueuePool
+        assert options["pool_size"] == 20
+        assert options["connect_args"] == {
+            "prepared_statement_cache_size": 500,
+            "server_settings": {"statement_timeout": "30000"},
+        }
+
+    def test_sqlite_engine_options(self):
+        """Test SQLite engines get no pool or driver tuning."""
+        config = Settings(DATABASE_URL="sqlite+aiosqlite:///:memory:", _env_file=None)
+
+        assert engine_options(config) == {"echo": False}
+
+    @pytest.mark.asyncio
+    async def test_pool_stats_record_waits(self, tmp_path):
+        """Test checkouts are counted and timed by the instrumented pool."""
+        test_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+        )
+        async with test_engine.connect():
+            stats = pool_stats(test_engine)
+        await test_engine.dispose()
+
+        assert stats["checked_out"] == 1
+        assert stats["wait_count"] == 1
+        assert stats["wait_seconds_total"] >= 0
+
+
+class TestReadReplicaRouting:
+    """Test get_read_db routing between the replica and the primary."""
+
+    @staticmethod
+    async def _resolve(primary: AsyncSession, headers: dict[str, str] | None = None):
+        request = Request(
+            {
+                "type": "http",
+                "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+            }
+        )
+        dependency = database.get_read_db(request, primary=primary)
+        session = await anext(dependency)
+        await dependency.aclose()
+        return session
+
+    @pytest.fixture
+    def replica(self, tmp_path, monkeypatch):
+        replica_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+        monkeypatch.setattr(database, "read_session", async_sessionmaker(replica_engine))
+        monkeypatch.setattr(database, "replica_routing", ReplicaRouting(60.0, 60.0))
+        return replica_engine
+
+    @pytest.mark.asyncio
+    async def test_reads_use_replica(self, async_db, replica):
+        """Test reads go to the replica when nothing forces the primary."""
+        session = await self._resolve(async_db)
+
+        assert session is not async_db
+        assert session.bind is replica
+
+    @pytest.mark.asyncio
+    async def test_header_forces_primary(self, async_db, replica):
+        """Test X-Read-Primary routes the read to the primary."""
+        assert await self._resolve(async_db, {"X-Read-Primary": "1"}) is async_db
+
+    @pytest.mark.asyncio
+    async def test_write_cookie_forces_primary(self, async_db, replica):
+        """Test only a client with an unexpired read-your-writes cookie reads the primary."""
+        until = time.time() + 60
+
+        assert await self._resolve(async_db, {"Cookie": f"read_primary_until={until}"}) is async_db
+        assert await self._resolve(async_db, {"Cookie": "read_primary_until=1"}) is not async_db
+        assert await self._resolve(async_db, {"Cookie": "read_primary_until=x"}) is not async_db
+
+    @pytest.mark.asyncio
+    async def test_other_clients_writes_keep_replica(self, async_db, replica, sample_category):
+        """Test a commit outside the request does not pin every client to the primary."""
+        await async_db.commit()
+
+        assert await self._resolve(async_db) is not async_db
+
+    @pytest.mark.asyncio
+    async def test_replica_results_not_cached_for_primary(
+        self, client, replica, sample_transaction
+    ):
+        """Test analytics read from a lagging replica are not served to primary reads."""
+        async with replica.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        lagging = await client.get("/api/analytics/balance")
+        primary = await client.get("/api/analytics/balance", headers={"X-Read-Primary": "1"})
+
+        assert lagging.json()["total_expenses"] == "0.00"
+        assert primary.json()["total_expenses"] == "50.00"
+
+    @pytest.mark.asyncio
+    async def test_write_response_sets_cookie(self, client, replica, sample_category):
+        """Test responses to writes carry the cookie and reads do not."""
+        created = await client.post("/api/categories/", json={"name": "Rent"})
+        read = await client.get(f"/api/categories/{sample_category.id}")
+
+        assert created.status_code == 201
+        assert float(created.cookies["read_primary_until"]) > time.time()
+        assert "set-cookie" not in read.headers
+
+    @pytest.mark.asyncio
+    async def test_unreachable_replica_falls_back(self, async_db, tmp_path, monkeypatch):
+        """Test a replica that cannot connect is skipped for the retry window."""
+        broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'x.db'}")
+        monkeypatch.setattr(database, "read_session", async_sessionmaker(broken))
+        monkeypatch.setattr(database, "replica_routing", ReplicaRouting(0.0, 60.0))
+
+        assert await self._resolve(async_db) is async_db
+        assert database.replica_routing.use_primary()
+
+
+class TestSystemEndpoints:
+    """Test system API endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_get_pool_stats_endpoint(self, client):
+        """Test GET /api/system/pool"""
+        response = await client.get("/api/system/pool")
+
+        assert response.status_code == 200
+        assert "pool_class" in response.json()
+        assert response.json()["replica"] is None
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self, client, sample_category):
+        """Test GET /metrics reports per-route latency and SQL work"""
+        await client.get(f"/api/categories/{sample_category.id}")
+
+        response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert (
+            'http_request_duration_seconds_count{method="GET",'
+            'route="/api/categories/{category_id}",status="200"}'
+        ) in body
+        assert 'http_request_sql_queries_bucket{method="GET",route="/api/categories/{category_id}"' in body
+        assert "db_query_duration_seconds_count" in body
+        assert body.count("# TYPE db_pool_checked_out gauge") <= 1
+
+    @pytest.mark.asyncio
+    async def test_replica_pool_reported(self, client, tmp_path, monkeypatch):
+        """Test the replica's pool shows up in /api/system/pool and /metrics"""
+        from app.routers import metrics, system
+
+        replica_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}", poolclass=InstrumentedQueuePool
+        )
+        monkeypatch.setattr(system, "read_engine", replica_engine)
+        monkeypatch.setattr(metrics, "read_engine", replica_engine)
+
+        pool = (await client.get("/api/system/pool")).json()
+        body = (await client.get("/metrics")).text
+
+        assert pool["replica"]["pool_class"] == "InstrumentedQueuePool"
+        assert pool["replica"]["timeouts"] == 0
+        assert 'db_pool_checked_out{pool="replica"} 0' in body
+        assert body.count("# TYPE db_pool_checked_out gauge") == 1
+        await replica_engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_track_queries_counts_statements(self, async_db):
+        """Test SQL statements are attributed to the active collector"""
+        with track_queries() as outer:
+            await async_db.execute(text("select 1"))
+            with track_queries() as inner:
+                await async_db.execute(text("select 2"))
+
+        assert outer.count == 2
+        assert inner.count == 1
+        assert outer.seconds >= inner.seconds > 0
+
+    @pytest.mark.asyncio
+    async def test_assert_max_queries_lists_statements(self, async_db):
+        """Test exceeding a statement budget fails with the captured SQL"""
+        with pytest.raises(QueryBudgetExceeded, match="select 2"):
+            with assert_max_queries(1):
+                await async_db.execute(text("select 1"))
+                await async_db.execute(text("select 2"))
@@ -1,10 +1,14 @@
+import json
 from datetime import date
 from decimal import Decimal
 
 import pytest
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from app.etag import DataVersions
 from app.exceptions import NotFoundException
+from app.metrics import QUERY_COUNT_HEADER, assert_max_queries
+from app.models.base import Base
 from app.models.category import Category
 from app.models.transaction import Transaction, TransactionType
 from app.schemas.transaction import TransactionCreate, TransactionUpdate
@@ -34,6 +38,28 @@ class TestTransactionService:
         assert txn.date == date(2024, 1, 10)
         assert txn.category_id == sample_category.id
 
+    @pytest.mark.asyncio
+    async def test_bulk_create_transactions(self, async_db: AsyncSession, sample_category):
+        """Test bulk ingestion inserts valid rows and reports the rest by index."""
+        records = [
+            {"amount": "10.00", "type": "expense", "date": "2024-01-01",
+             "category_id": sample_category.id},
+            {"amount": "-1.00", "type": "expense", "date": "2024-01-01",
+             "category_id": sample_category.id},
+            {"amount": "20.00", "type": "income", "date": "2024-01-02", "category_id": 9999},
+            b'{"amount": "30.00", "type": "income", "date": "2024-01-03", "category_id": %d}'
+            % sample_category.id,
+            b"{not json",
+        ]
+
+        result = await transaction_service.bulk_create_transactions(async_db, records)
+
+        assert result.created == 2
+        assert [e.index for e in result.errors] == [1, 2, 4]
+        assert "category_id" in result.errors[1].errors[0]
+        created = [await transaction_service.get_transaction(async_db, i) for i in result.ids]
+        assert [t.amount for t in created] == [Decimal("10.00"), Decimal("30.00")]
+
     @pytest.mark.asyncio
     async def test_get_transaction(self, async_db: AsyncSession, sample_transaction):
         """Test getting a transaction."""
@@ -129,6 +155,76 @@ class TestTransactionService:
         )
         assert len(page2) == 10
 
+        # The last page shows where the results end, so no count is needed
+        with assert_max_queries(1):
+            last = await transaction_service.list_transactions_page(
+                async_db, page=3, per_page=10
+            )
+        assert last.total == 25
+        assert last.has_more is False
+
+        estimated = await transaction_service.list_transactions_page(
+            async_db, per_page=10, count="estimated"
+        )
+        assert estimated.total == 25
+        assert estimated.has_more is True
+
+    @pytest.mark.asyncio
+    async def test_list_transactions_cursor(
+        self, async_db: AsyncSession, sample_category
+    ):
+        """Test keyset pagination walks every row once with a stable id tie-break."""
+        for i in range(7):
+            async_db.add(
+                Transaction(
+                    amount=Decimal("10.00"),
+                    type=TransactionType.EXPENSE,
+                    date=date(2024, 1, 1 + i % 2),
+                    category_id=sample_category.id,
+                )
+            )
+        await async_db.flush()
+
+        seen = []
+        cursor = None
+        while True:
+            items, total = await transaction_service.list_transactions(
+                async_db, per_page=3, cursor=cursor, include_total=False
+            )
+            assert total is None
+            seen.extend(items)
+            if len(items) < 3:
+                break
+            cursor = transaction_service.encode_cursor(items[-1])
+
+        assert len({t.id for t in seen}) == 7
+        keys = [(t.date, t.id) for t in seen]
+        assert keys == sorted(keys, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_iter_transaction_batches(self, async_db: AsyncSession, sample_category):
+        """Test export batches are bounded in size and cover every filtered row."""
+        for i in range(5):
+            async_db.add(
+                Transaction(
+                    amount=Decimal("1.00"),
+                    type=TransactionType.EXPENSE if i % 2 else TransactionType.INCOME,
+                    date=date(2024, 1, i + 1),
+                    category_id=sample_category.id,
+                )
+            )
+        await async_db.flush()
+
+        batches = [
+            batch
+            async for batch in transaction_service.iter_transaction_batches(
+                async_db, type=TransactionType.INCOME, batch_size=2
+            )
+        ]
+
+        assert [len(b) for b in batches] == [2, 1]
+        assert all(row.type == TransactionType.INCOME for b in batches for row in b)
+
     @pytest.mark.asyncio
     async def test_update_transaction(
         self, async_db: AsyncSession, sample_transaction
@@ -156,6 +252,23 @@ class TestTransactionService:
         with pytest.raises(NotFoundException):
             await transaction_service.update_transaction(async_db, 9999, update_data)
 
+    @pytest.mark.asyncio
+    async def test_update_missing_transaction_leaves_rollup_alone(
+        self, async_db: AsyncSession, sample_category
+    ):
+        """Test a full update of a missing transaction writes no rollup row."""
+        from sqlalchemy import func, select
+
+        from app.models.daily_total import DailyTotal
+
+        update_data = TransactionUpdate(
+            amount=Decimal("5.00"), type=TransactionType.EXPENSE,
+            date=date(2024, 1, 1), category_id=sample_category.id,
+        )
+        with pytest.raises(NotFoundException):
+            await transaction_service.update_transaction(async_db, 999, update_data)
+        assert await async_db.scalar(select(func.count()).select_from(DailyTotal)) == 0
+
     @pytest.mark.asyncio
     async def test_delete_transaction(
         self, async_db: AsyncSession, sample_transaction
@@ -174,13 +287,95 @@ class TestTransactionService:
         with pytest.raises(NotFoundException):
             await transaction_service.delete_transaction(async_db, 9999)
 
+    @pytest.mark.asyncio
+    async def test_write_batcher_groups_concurrent_creates(self, tmp_path):
+        """Test concurrent creates share one INSERT and commit, each with its own outcome."""
+        import asyncio
+
+        from sqlalchemy import func, select
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from app.exceptions import ValidationException
+        from app.models.base import Base
+        from app.models.daily_total import DailyTotal
+        from app.services.write_batcher import TransactionWriteBatcher
+
+        # A file database: the batcher commits from its own sessions
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'batch.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as db:
+            category = Category(name="Groceries")
+            db.add(category)
+            await db.commit()
+
+        batcher = TransactionWriteBatcher(window=0.05, max_rows=100)
+        batcher.start(session_factory)
+        rows = [
+            TransactionCreate(amount=Decimal(f"{i}.00"), type=TransactionType.EXPENSE,
+                              date=date(2024, 1, 15), category_id=category.id)
+            for i in range(1, 6)
+        ]
+        rows.append(rows[0].model_copy(update={"category_id": 9999}))
+        results = await asyncio.gather(
+            *(batcher.submit(data) for data in rows), return_exceptions=True
+        )
+        await batcher.stop()
+
+        assert batcher.batches == 1
+        assert [txn.amount for txn in results[:5]] == [Decimal(f"{i}.00") for i in range(1, 6)]
+        assert len({txn.id for txn in results[:5]}) == 5
+        assert isinstance(results[5], ValidationException)
+        async with session_factory() as db:
+            assert await db.scalar(select(func.count(Transaction.id))) == 5
+            assert await db.scalar(select(DailyTotal.total)) == Decimal("15.00")
+        assert not batcher.running
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_write_batcher_survives_failures(self, monkeypatch):
+        """Test a failing batch fails only its own requests and the writer keeps going."""
+        import asyncio
+
+        from app.services.write_batcher import TransactionWriteBatcher
+
+        def broken_session():
+            raise ConnectionError("database went away")
+
+        batcher = TransactionWriteBatcher(window=0.01, max_rows=10)
+        batcher.start(broken_session)
+        data = TransactionCreate(amount=Decimal("1.00"), type=TransactionType.EXPENSE,
+                                 date=date(2024, 1, 15), category_id=1)
+        with pytest.raises(ConnectionError):
+            await batcher.submit(data)
+
+        async def crash(batch):
+            raise RuntimeError("unexpected")
+
+        monkeypatch.setattr(batcher, "_write", crash)
+        results = await asyncio.gather(
+            batcher.submit(data), batcher.submit(data), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert batcher.running
+
+        # Requests still queued when the writer stops fail instead of hanging
+        pending = asyncio.ensure_future(batcher.submit(data))
+        await asyncio.sleep(0)
+        batcher._task.cancel()
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(pending, 1)
+        assert not batcher.running
+        await batcher.stop()
+
 
 class TestTransactionEndpoints:
     """Test transaction API endpoints."""
 
     @pytest.mark.asyncio
     async def test_create_transaction_endpoint(
-        self, client, sample_category
+        self, client, sample_category, loaded_categories
     ):
         """Test POST /api/transactions/"""
         response = await client.post(
@@ -195,10 +390,94 @@ class TestTransactionEndpoints:
         )
 
         assert response.status_code == 201
+        # INSERT ... RETURNING, the rollup upsert and budgets.spent; no read-back SELECT
+        assert int(response.headers[QUERY_COUNT_HEADER]) <= 3
         data = response.json()
         assert data["amount"] == "150.50"
         assert data["type"] == "expense"
         assert data["description"] == "Test transaction"
+        assert data["created_at"] is not None
+
+        response = await client.post(
+            "/api/transactions/",
+            json={"amount": 12.5, "type": "income", "date": "2024-01-21",
+                  "category_id": sample_category.id},
+        )
+        assert response.json()["amount"] == "12.50"
+
+    @pytest.mark.asyncio
+    async def test_bulk_ndjson_is_streamed_in_chunks(self, client, sample_category, monkeypatch):
+        """Test NDJSON split across body chunks is inserted chunk by chunk, indexed globally."""
+        monkeypatch.setattr(transaction_service, "BULK_CHUNK_SIZE", 2)
+        chunks = []
+        existing_categories = transaction_service.category_directory.existing
+
+        async def existing(db, category_ids):
+            chunks.append(None)
+            return await existing_categories(db, category_ids)
+
+        monkeypatch.setattr(transaction_service.category_directory, "existing", existing)
+        row = json.dumps({"amount": "1.00", "type": "expense", "date": "2024-02-01",
+                          "category_id": sample_category.id})
+        body = "\n".join([row, row, "{}", "", row, row]).encode()
+
+        async def stream():
+            for start in range(0, len(body), 7):
+                yield body[start : start + 7]
+
+        response = await client.post(
+            "/api/transactions/bulk",
+            content=stream(),
+            headers={"content-type": "application/x-ndjson"},
+        )
+        data = response.json()
+        assert data["created"] == 4
+        assert [error["index"] for error in data["errors"]] == [2]
+        # Five records (the blank line is skipped) in chunks of two
+        assert len(chunks) == 3
+
+    @pytest.mark.asyncio
+    async def test_bulk_create_transactions_endpoint(self, client, sample_category):
+        """Test POST /api/transactions/bulk with a JSON array and with NDJSON."""
+        row = {"amount": "12.50", "type": "expense", "date": "2024-02-01",
+               "category_id": sample_category.id}
+
+        response = await client.post("/api/transactions/bulk", json=[row] * 3)
+        assert response.status_code == 201
+        # Category load, insert, rollup upsert, budgets.spent. Ids come back in input
+        # order, which SQLite can only promise one row per INSERT; Postgres batches them.
+        assert int(response.headers[QUERY_COUNT_HEADER]) <= 3 + 3
+        assert response.json()["created"] == 3
+
+        body = "\n".join(json.dumps(r) for r in [row, {"amount": "1.00"}]) + "\n"
+        response = await client.post(
+            "/api/transactions/bulk",
+            content=body,
+            headers={"content-type": "application/x-ndjson"},
+        )
+        data = response.json()
+        assert data["created"] == 1
+        assert data["errors"][0]["index"] == 1
+
+        response = await client.post("/api/transactions/bulk", json={"amount": "1.00"})
+        assert response.status_code == 422
+
+        # A JSON array element must be an object, not a JSON document in a string
+        response = await client.post("/api/transactions/bulk", json=[json.dumps(row), 5, row])
+        data = response.json()
+        assert data["created"] == 1
+        assert [error["index"] for error in data["errors"]] == [0, 1]
+
+    @pytest.mark.asyncio
+    async def test_create_transaction_unknown_category(self, client, loaded_categories):
+        """Test an unknown category_id is rejected before the INSERT."""
+        response = await client.post(
+            "/api/transactions/",
+            json={"amount": "5.00", "type": "expense", "date": "2024-01-20", "category_id": 9999},
+        )
+
+        assert response.status_code == 422
+        assert "Category with id 9999 not found" in response.json()["detail"]
 
     @pytest.mark.asyncio
     async def test_create_transaction_invalid_amount(self, client, sample_category):
@@ -221,6 +500,7 @@ class TestTransactionEndpoints:
         response = await client.get("/api/transactions/")
 
         assert response.status_code == 200
+        assert int(response.headers[QUERY_COUNT_HEADER]) <= 2
         data = response.json()
         assert "items" in data
         assert "total" in data
@@ -228,6 +508,11 @@ class TestTransactionEndpoints:
         assert "per_page" in data
         assert len(data["items"]) > 0
 
+        # The list is serialized by ModelResponse, the detail route by FastAPI
+        detail = await client.get(f"/api/transactions/{sample_transaction.id}")
+        assert data["items"][0] == detail.json()
+        assert data["items"][0]["amount"] == "50.00"
+
     @pytest.mark.asyncio
     async def test_list_transactions_with_filters_endpoint(
         self, client, sample_category
@@ -247,6 +532,147 @@ class TestTransactionEndpoints:
         data = response.json()
         assert "items" in data
 
+    @pytest.mark.asyncio
+    async def test_list_transactions_cursor_endpoint(self, client, sample_category):
+        """Test GET /api/transactions/ following next_cursor without totals."""
+        for day in (1, 2, 3):
+            await client.post(
+                "/api/transactions/",
+                json={
+                    "amount": "5.00",
+                    "type": "expense",
+                    "date": f"2024-03-0{day}",
+                    "category_id": sample_category.id,
+                },
+            )
+
+        response = await client.get(
+            "/api/transactions/", params={"per_page": 2, "include_total": False}
+        )
+        data = response.json()
+        assert data["total"] is None
+        assert [item["date"] for item in data["items"]] == ["2024-03-03", "2024-03-02"]
+        assert data["next_cursor"] is not None
+
+        response = await client.get(
+            "/api/transactions/", params={"per_page": 2, "cursor": data["next_cursor"]}
+        )
+        data = response.json()
+        assert [item["date"] for item in data["items"]] == ["2024-03-01"]
+        assert data["next_cursor"] is None
+
+    @pytest.mark.asyncio
+    async def test_list_transactions_count_modes_endpoint(self, client, sample_category):
+        """Test GET /api/transactions/?count=exact|estimated|none."""
+        rows = [{"amount": "5.00", "type": "expense", "date": f"2024-03-0{day}",
+                 "category_id": sample_category.id} for day in (1, 2, 3)]
+        await client.post("/api/transactions/bulk", json=rows)
+
+        response = await client.get("/api/transactions/", params={"per_page": 2, "count": "none"})
+        data = response.json()
+        assert data["total"] is None
+        assert data["has_more"] is True
+        # One limit+1 fetch, no count, plus the ETag counter read
+        assert int(response.headers[QUERY_COUNT_HEADER]) == 2
+
+        for mode in ("exact", "estimated"):
+            response = await client.get(
+                "/api/transactions/",
+                params={"per_page": 2, "count": mode, "start_date": "2024-03-02"},
+            )
+            data = response.json()
+            assert data["total"] == 2
+            assert data["has_more"] is False
+
+        response = await client.get("/api/transactions/", params={"count": "approximate"})
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_list_transactions_conditional_get(self, client, async_db, sample_transaction):
+        """Test If-None-Match gets a 304 after one counter query until a transaction is written."""
+        response = await client.get("/api/transactions/")
+        etag = response.headers["etag"]
+
+        response = await client.get("/api/transactions/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert int(response.headers[QUERY_COUNT_HEADER]) == 1
+
+        await client.put(
+            f"/api/transactions/{sample_transaction.id}", json={"description": "changed"}
+        )
+        # The test session stands in for get_db, which commits after the response
+        await async_db.commit()
+        response = await client.get("/api/transactions/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    @pytest.mark.asyncio
+    async def test_etags_agree_across_workers(self, tmp_path):
+        """Test two workers derive the same tag, and both see a write once it commits."""
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'shared.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        workers = (DataVersions(), DataVersions())
+        tables = ("categories", "transactions")
+
+        async def tags():
+            async with sessions() as first, sessions() as second:
+                return [await w.etag(db, tables) for w, db in zip(workers, (first, second))]
+
+        before = await tags()
+        async with sessions() as db:
+            category = Category(name="Rent")
+            db.add(category)
+            await db.flush()
+            await transaction_service.create_transaction(
+                db,
+                TransactionCreate(
+                    amount=Decimal("5.00"),
+                    type=TransactionType.EXPENSE,
+                    date=date(2024, 1, 1),
+                    category_id=category.id,
+                ),
+            )
+            # Counters move only after the commit, so writers hold no lock on them
+            assert await tags() == before
+            await db.commit()
+        after = await tags()
+
+        assert before[0] == before[1]
+        assert after[0] == after[1]
+        assert after[0] != before[0]
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_list_transactions_invalid_cursor_endpoint(self, client):
+        """Test GET /api/transactions/ with a malformed cursor."""
+        response = await client.get("/api/transactions/", params={"cursor": "not-a-cursor"})
+
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_export_transactions_endpoint(self, client, sample_transaction):
+        """Test GET /api/transactions/export as CSV and NDJSON."""
+        response = await client.get("/api/transactions/export")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        lines = response.text.splitlines()
+        assert lines[0].startswith("id,date,type,amount")
+        assert lines[1].split(",")[:4] == [
+            str(sample_transaction.id), "2024-01-15", "expense", "50.00"
+        ]
+
+        response = await client.get(
+            "/api/transactions/export", params={"format": "ndjson", "type": "expense"}
+        )
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert rows[0]["id"] == sample_transaction.id
+        assert rows[0]["amount"] == "50.00"
+
     @pytest.mark.asyncio
     async def test_get_transaction_endpoint(self, client, sample_transaction):
         """Test GET /api/transactions/{transaction_id}"""
@@ -278,6 +704,8 @@ class TestTransactionEndpoints:
         )
 
         assert response.status_code == 200
+        # Old values FOR UPDATE, UPDATE ... RETURNING, rollup upsert, budgets.spent
+        assert int(response.headers[QUERY_COUNT_HEADER]) <= 4
         data = response.json()
         assert data["amount"] == "99.99"
         assert data["description"] == "Updated via API"
@@ -288,6 +716,7 @@ class TestTransactionEndpoints:
         response = await client.delete(f"/api/transactions/{sample_transaction.id}")
 
         assert response.status_code == 204
+        assert int(response.headers[QUERY_COUNT_HEADER]) <= 3
 
         # Verify deletion
         response = await client.get(f"/api/transactions/{sample_transaction.id}")